@@ -0,0 +1,31 @@
+"""Add user_seen_questions table
+
+Revision ID: 5e93c0a1f6d8
+Revises: d4a7b19c3e52
+Create Date: 2026-10-18 14:26:05.733918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e93c0a1f6d8'
+down_revision: Union[str, None] = 'd4a7b19c3e52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_seen_questions',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bits', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_seen_questions')
@@ -0,0 +1,31 @@
+"""Add scores (user_id, date, id) index
+
+Revision ID: 8c1f4e2b7a90
+Revises: 31245114dfd4
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f4e2b7a90'
+down_revision: Union[str, None] = '31245114dfd4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_scores_user_id_date_id',
+        'scores',
+        ['user_id', sa.text('date DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scores_user_id_date_id', table_name='scores')
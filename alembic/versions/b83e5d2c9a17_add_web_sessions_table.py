@@ -0,0 +1,33 @@
+"""Add web_sessions table
+
+Revision ID: b83e5d2c9a17
+Revises: 5e93c0a1f6d8
+Create Date: 2026-10-18 16:02:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83e5d2c9a17'
+down_revision: Union[str, None] = '5e93c0a1f6d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('web_sessions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_web_sessions_expires_at'), 'web_sessions', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_web_sessions_expires_at'), table_name='web_sessions')
+    op.drop_table('web_sessions')
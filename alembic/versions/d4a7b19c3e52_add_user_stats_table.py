@@ -0,0 +1,37 @@
+"""Add user_stats table
+
+Revision ID: d4a7b19c3e52
+Revises: 8c1f4e2b7a90
+Create Date: 2026-10-18 11:03:47.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7b19c3e52'
+down_revision: Union[str, None] = '8c1f4e2b7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('total_hits', sa.Integer(), nullable=False),
+    sa.Column('total_questions', sa.Integer(), nullable=False),
+    sa.Column('mean_score', sa.Float(), nullable=False),
+    sa.Column('best_score', sa.Float(), nullable=True),
+    sa.Column('last_score', sa.Float(), nullable=True),
+    sa.Column('last_attempt_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import os
+import time
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import Score
+from .questions import QuestionIndex
+
+# Orders of magnitude of the answers that get their own bucket, the rest are
+# folded into the first and last bucket
+MAGNITUDE_MIN = -3
+MAGNITUDE_MAX = 15
+
+ANALYTICS_CHUNK_SIZE = 5000
+# Shortest time between two recomputations of the cached analytics, seconds
+ANALYTICS_MIN_INTERVAL = float(os.getenv("ANALYTICS_MIN_INTERVAL", "300"))
+
+
+class CalibrationAccumulator:
+    """Running hit counts per question, per answer magnitude and per month.
+
+    Memory depends on the size of the question bank and the number of months,
+    not on the number of attempts fed in.
+    """
+
+    def __init__(self, question_index: QuestionIndex):
+        self.question_index = question_index
+        self._text_positions = {
+            text: i for i, text in enumerate(question_index.texts)
+        }
+        n_questions = len(question_index)
+        n_magnitudes = MAGNITUDE_MAX - MAGNITUDE_MIN + 1
+        self.question_hits = np.zeros(n_questions, dtype=np.int64)
+        self.question_totals = np.zeros(n_questions, dtype=np.int64)
+        self.magnitude_hits = np.zeros(n_magnitudes, dtype=np.int64)
+        self.magnitude_totals = np.zeros(n_magnitudes, dtype=np.int64)
+        self.month_hits = {}
+        self.month_totals = {}
+        self.attempts = 0
+
+    def _position(self, result: dict) -> int:
+        """Row of the question in the bank, or -1 if it is no longer there."""
+        question_id = result.get("question_id")
+        if question_id is not None and question_id in self.question_index:
+            return self.question_index.positions([question_id])[0]
+        # Attempts from before question ids were stored only have the text
+        return self._text_positions.get(result.get("question"), -1)
+
+    def add_chunk(self, rows):
+        """Fold a chunk of (date, details) rows into the totals."""
+        positions, hits, answers, months = [], [], [], []
+        for date, details in rows:
+            self.attempts += 1
+            month = date.year * 12 + date.month - 1 if date is not None else -1
+            for result in details:
+                positions.append(self._position(result))
+                hits.append(bool(result.get("correct")))
+                answers.append(float(result.get("correct_answer", 0.0)))
+                months.append(month)
+        if not positions:
+            return
+
+        positions = np.array(positions, dtype=np.int64)
+        hits = np.array(hits, dtype=np.int64)
+        answers = np.abs(np.array(answers, dtype=np.float64))
+        months = np.array(months, dtype=np.int64)
+
+        known = positions >= 0
+        n_questions = len(self.question_totals)
+        self.question_totals += np.bincount(positions[known], minlength=n_questions)
+        self.question_hits += np.bincount(
+            positions[known], weights=hits[known], minlength=n_questions
+        ).astype(np.int64)
+
+        with np.errstate(divide="ignore"):
+            magnitudes = np.floor(np.log10(answers))
+        magnitudes = np.nan_to_num(magnitudes, neginf=MAGNITUDE_MIN)
+        buckets = np.clip(magnitudes, MAGNITUDE_MIN, MAGNITUDE_MAX).astype(np.int64)
+        buckets -= MAGNITUDE_MIN
+        n_magnitudes = len(self.magnitude_totals)
+        self.magnitude_totals += np.bincount(buckets, minlength=n_magnitudes)
+        self.magnitude_hits += np.bincount(
+            buckets, weights=hits, minlength=n_magnitudes
+        ).astype(np.int64)
+
+        unique_months, inverse = np.unique(months, return_inverse=True)
+        month_totals = np.bincount(inverse)
+        month_hits = np.bincount(inverse, weights=hits)
+        for month, total, hit in zip(
+            unique_months.tolist(), month_totals.tolist(), month_hits.tolist()
+        ):
+            if month < 0:
+                continue
+            self.month_totals[month] = self.month_totals.get(month, 0) + total
+            self.month_hits[month] = self.month_hits.get(month, 0) + int(hit)
+
+    def result(self) -> dict:
+        def rate(hits, total):
+            return hits / total if total else None
+
+        total = int(self.magnitude_totals.sum())
+        return {
+            "attempts": self.attempts,
+            "answers": total,
+            "hit_rate": rate(int(self.magnitude_hits.sum()), total),
+            "per_question": [
+                {
+                    "question_id": self.question_index.ids[i],
+                    "question": self.question_index.texts[i],
+                    "answers": int(self.question_totals[i]),
+                    "hit_rate": rate(
+                        int(self.question_hits[i]), int(self.question_totals[i])
+                    ),
+                }
+                for i in range(len(self.question_totals))
+            ],
+            "per_magnitude": [
+                {
+                    "magnitude": MAGNITUDE_MIN + i,
+                    "answers": int(self.magnitude_totals[i]),
+                    "hit_rate": rate(
+                        int(self.magnitude_hits[i]), int(self.magnitude_totals[i])
+                    ),
+                }
+                for i in range(len(self.magnitude_totals))
+                if self.magnitude_totals[i]
+            ],
+            "per_month": [
+                {
+                    "month": f"{month // 12:04d}-{month % 12 + 1:02d}",
+                    "answers": self.month_totals[month],
+                    "hit_rate": rate(self.month_hits[month], self.month_totals[month]),
+                }
+                for month in sorted(self.month_totals)
+            ],
+        }
+
+
+async def compute_calibration(
+    db: AsyncSession,
+    question_index: QuestionIndex,
+    chunk_size: int = ANALYTICS_CHUNK_SIZE,
+) -> dict:
+    """Stream every stored attempt through a CalibrationAccumulator.
+
+    Chunks are folded in on a worker thread, the event loop only fetches.
+    """
+    loop = asyncio.get_running_loop()
+    accumulator = CalibrationAccumulator(question_index)
+    result = await db.stream(
+        select(Score.date, Score.details).execution_options(yield_per=chunk_size)
+    )
+    async for rows in result.partitions():
+        await loop.run_in_executor(None, accumulator.add_chunk, rows)
+    return accumulator.result()
+
+
+class CalibrationCache:
+    """Keeps the last analytics result, keyed by the newest score id.
+
+    New scores make the result stale, but it is recomputed at most once per
+    ``min_interval`` seconds: meanwhile, and while the single background
+    recompute runs, the stale result is served. Only the first request for a
+    question bank waits for a computation.
+    """
+
+    def __init__(self, min_interval: float = ANALYTICS_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._version = None
+        self._index = None
+        self._result = None
+        self._started = None
+        self._task = None
+
+    def _is_fresh(self, version, question_index) -> bool:
+        return (
+            self._result is not None
+            and self._version == version
+            and self._index is question_index
+        )
+
+    async def get(self, session_factory, question_index: QuestionIndex) -> dict:
+        async with session_factory() as db:
+            version = await db.scalar(select(func.max(Score.id)))
+        if self._is_fresh(version, question_index):
+            return self._result
+
+        if self.latest(question_index) is not None:
+            due = time.monotonic() - self._started >= self.min_interval
+            if due and self._task is None:
+                self._task = asyncio.create_task(
+                    self._refresh(session_factory, question_index, version)
+                )
+            return self._result
+
+        if self._task is None:
+            self._task = asyncio.create_task(
+                self._refresh(session_factory, question_index, version)
+            )
+        await asyncio.shield(self._task)
+        result = self.latest(question_index)
+        if result is None:
+            raise RuntimeError("Calibration analytics could not be computed")
+        return result
+
+    async def _refresh(self, session_factory, question_index: QuestionIndex, version):
+        self._started = time.monotonic()
+        try:
+            async with session_factory() as db:
+                result = await compute_calibration(db, question_index)
+        except Exception:
+            logging.exception("Computing calibration analytics failed")
+        else:
+            self._result = result
+            self._version = version
+            self._index = question_index
+        finally:
+            self._task = None
+
+    def latest(self, question_index: QuestionIndex):
+        """The last computed result for this bank, without recomputing it."""
+        return self._result if self._index is question_index else None
+
+    async def wait(self):
+        """Wait for a running background recompute, if there is one."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def clear(self):
+        self._version = None
+        self._index = None
+        self._result = None
+        self._started = None
+
+
+calibration_cache = CalibrationCache()
@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import stat
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # .br files are only written when brotli is installed
+    brotli = None
+
+# Fingerprinted copies of static/ are written to static/dist by the build step
+ASSET_DIST_DIR = "dist"
+ASSET_MANIFEST = "manifest.json"
+# Only these are worth precompressing, images and fonts are already compressed
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".svg", ".html", ".txt", ".ico"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Files without a hash in the name may change under the same URL
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Encodings we have precompressed files for, in order of preference
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+
+
+def fingerprint(path: str, content: bytes) -> str:
+    """css/style.css -> css/style.<hash>.css"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+def build_assets(static_dir: str = "static") -> dict:
+    """Write fingerprinted, precompressed copies of static/ and their manifest.
+
+    The previous build is removed first. Returns the manifest, which maps
+    each source path to its fingerprinted path, both relative to static/.
+    """
+    dist_dir = os.path.join(static_dir, ASSET_DIST_DIR)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    if brotli is None:
+        logging.warning("brotli is not installed, writing .gz files only")
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                content = f.read()
+            hashed = fingerprint(path, content)
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+            if os.path.splitext(name)[1] in COMPRESSIBLE_SUFFIXES:
+                with open(target + ".gz", "wb") as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + ".br", "wb") as f:
+                        f.write(brotli.compress(content, quality=11))
+            manifest[path] = hashed
+
+    with open(os.path.join(dist_dir, ASSET_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Resolves static asset paths to their fingerprinted URLs.
+
+    Without a build (development, tests) every asset resolves to its plain
+    /static URL, so templates work either way.
+    """
+
+    def __init__(self, static_dir: str = "static", url_prefix: str = "/static"):
+        self.url_prefix = url_prefix
+        self.paths = {}
+        manifest_path = os.path.join(static_dir, ASSET_DIST_DIR, ASSET_MANIFEST)
+        try:
+            with open(manifest_path, "r") as f:
+                self.paths = json.load(f)
+        except FileNotFoundError:
+            logging.info("No asset manifest found, serving unversioned static files")
+
+    def url(self, path: str) -> str:
+        hashed = self.paths.get(path)
+        if hashed is None:
+            return f"{self.url_prefix}/{path}"
+        return f"{self.url_prefix}/{ASSET_DIST_DIR}/{hashed}"
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings from an Accept-Encoding header, minus those with q=0."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = params.strip().removeprefix("q=") if params else "1"
+        try:
+            if float(q) > 0:
+                accepted.add(coding.strip().lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that serves precompressed variants and sets cache headers.
+
+    Files under dist/ carry their content hash in the name and are cached for
+    a year; everything else has to be revalidated.
+    """
+
+    async def get_response(self, path: str, scope) -> FileResponse:
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if path.startswith(ASSET_DIST_DIR + "/"):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed_response(self, path: str, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + suffix
+                )
+            except PermissionError:
+                raise HTTPException(status_code=401)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            media_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(
+                full_path,
+                stat_result=stat_result,
+                media_type=media_type or "application/octet-stream",
+                headers={"Content-Encoding": encoding},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
@@ -1,14 +1,39 @@
 from passlib.context import CryptContext
-from jose import jwt
-from datetime import datetime, timedelta
+from jose import JWTError, jwt
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException, status
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import TTLCache
+from .metrics import BCRYPT_REJECTED, BCRYPT_SECONDS, BCRYPT_WAIT_SECONDS
 from .models import User
+import asyncio
+import hashlib
+import os
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-SECRET_KEY = "YOUR_SECRET_KEY"
+# Signs access tokens, which are accepted as Bearer credentials by the API.
+# There is no default: without it no tokens are issued or accepted.
+SECRET_KEY = os.getenv("SECRET_KEY", "")
 ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+
+# Worker pool for bcrypt, configurable from the environment
+HASH_POOL_KIND = os.getenv("HASH_POOL_KIND", "thread")  # "thread" or "process"
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "4"))
+HASH_POOL_MAX_QUEUE = int(os.getenv("HASH_POOL_MAX_QUEUE", "32"))
+
+# Users known to exist, keyed by id, so sessions skip the lookup query
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "4096"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "300"))
+identity_cache = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+
+# Verified access token claims, keyed by token digest, kept until the token expires
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 
 def verify_password(plain_password, hashed_password):
@@ -19,12 +44,123 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def _timed_call(func, *args):
+    """Run func in the worker and report how long the call itself took."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingPool:
+    """Bounded executor that keeps bcrypt work off the event loop.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    wait for a free worker. Anything beyond that is rejected with a 503 right
+    away instead of piling up behind a login burst.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            BCRYPT_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_time = await loop.run_in_executor(
+                self._get_executor(), _timed_call, func, *args
+            )
+        finally:
+            self._pending -= 1
+        # Whatever was not spent hashing was spent waiting for a worker
+        wait_time = max(0.0, time.perf_counter() - submitted - run_time)
+        self._completed += 1
+        self._wait_total += wait_time
+        self._wait_max = max(self._wait_max, wait_time)
+        self._run_total += run_time
+        BCRYPT_SECONDS.observe(run_time, func.__name__)
+        BCRYPT_WAIT_SECONDS.observe(wait_time, func.__name__)
+        return result
+
+    def stats(self) -> dict:
+        completed = self._completed or 1
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_wait_seconds": self._wait_total / completed,
+            "max_wait_seconds": self._wait_max,
+            "avg_run_seconds": self._run_total / completed,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    kind=HASH_POOL_KIND,
+    max_workers=HASH_POOL_WORKERS,
+    max_queue=HASH_POOL_MAX_QUEUE,
+)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    return await hashing_pool.run(get_password_hash, password)
+
+
+def tokens_enabled() -> bool:
+    """Whether SECRET_KEY is set, so access tokens can be issued and checked."""
+    return bool(SECRET_KEY)
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
+    if not tokens_enabled():
+        raise RuntimeError("SECRET_KEY is not set, cannot sign access tokens")
     to_encode = data.copy()
+    # jose reads naive datetimes as UTC, so local time would shift the expiry
     if expires_delta:
-        expire = datetime.now() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now() + timedelta(minutes=15)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -34,6 +170,75 @@ async def authenticate_user(username: str, password: str, db: AsyncSession) -> U
     async with db as session:
         result = await session.execute(select(User).where(User.username == username))
         user = result.scalars().first()
-        if user and verify_password(password, user.hashed_password):
+        if user and await verify_password_async(password, user.hashed_password):
             return user
         return None
+
+
+async def resolve_session_user_id(session: dict, db: AsyncSession):
+    """Turn a signed session into the id of an existing user, or None.
+
+    The id is stored in the session at login and confirmed against the
+    identity cache, so the database is only hit on a cache miss. Sessions
+    from before the id was stored are looked up by username once and
+    upgraded in place.
+    """
+    if not session.get("is_authenticated"):
+        return None
+
+    user_id = session.get("user_id")
+    if user_id is not None:
+        if identity_cache.get(user_id) is not None:
+            return user_id
+        result = await db.execute(select(User.username).where(User.id == user_id))
+    else:
+        result = await db.execute(
+            select(User.id, User.username).where(
+                User.username == session.get("username")
+            )
+        )
+
+    row = result.first()
+    if row is None:
+        return None
+    if user_id is None:
+        user_id = row.id
+        session["user_id"] = user_id
+    identity_cache.set(user_id, row.username)
+    return user_id
+
+
+def verify_access_token(token: str):
+    """Claims of a valid, unexpired access token, or None.
+
+    Verified claims are cached by the token's digest until the token expires,
+    so repeated API calls with the same token skip the signature check.
+    """
+    if not tokens_enabled():
+        return None
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    remaining = claims.get("exp", 0) - time.time()
+    if remaining > 0:
+        token_cache.set(key, claims, ttl=remaining)
+    return claims
+
+
+async def resolve_token_user_id(token: str, db: AsyncSession):
+    """Id of the existing user a Bearer token was issued to, or None."""
+    claims = verify_access_token(token)
+    if claims is None or "uid" not in claims:
+        return None
+    user_id = claims["uid"]
+    if identity_cache.get(user_id) is None:
+        username = await db.scalar(select(User.username).where(User.id == user_id))
+        if username is None:
+            return None
+        identity_cache.set(user_id, username)
+    return user_id
@@ -1,16 +1,68 @@
+import logging
 import os
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Load environment variables
 from dotenv import load_dotenv
+from .metrics import METRICS_ENABLED, instrument_engine
 
 load_dotenv()
 
 # Get the database URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./production.db")
-print(f"DATABASE_URL: {DATABASE_URL}")
-engine = create_async_engine(DATABASE_URL, echo=False)
+logging.debug(
+    "DATABASE_URL: %s", make_url(DATABASE_URL).render_as_string(hide_password=True)
+)
+
+# PRAGMAs applied to every new SQLite connection, selected with SQLITE_TUNING
+SQLITE_PROFILES = {
+    "none": {},
+    "production": {
+        "journal_mode": "WAL",  # Readers no longer block the writer
+        "synchronous": "NORMAL",  # fsync on checkpoint instead of every commit
+        "busy_timeout": 5000,  # Wait up to 5s for the write lock
+        "cache_size": -64000,  # 64 MB page cache (negative means KiB)
+        "mmap_size": 268435456,  # Map up to 256 MB of the file
+        "temp_store": "MEMORY",
+    },
+}
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "production")
+
+
+def apply_sqlite_tuning(engine, profile: str = SQLITE_TUNING):
+    """Register a connect event that sets the profile's PRAGMAs."""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite tuning profile: {profile}")
+    pragmas = SQLITE_PROFILES[profile]
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def pool_options() -> dict:
+    """Connection pool settings from the environment, only those that are set."""
+    options = {}
+    if os.getenv("DB_POOL_SIZE"):
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE"))
+    if os.getenv("DB_MAX_OVERFLOW"):
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW"))
+    if os.getenv("DB_POOL_RECYCLE"):
+        options["pool_recycle"] = int(os.getenv("DB_POOL_RECYCLE"))
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, echo=False, **pool_options())
+apply_sqlite_tuning(engine)
+if METRICS_ENABLED:
+    instrument_engine(engine)
 SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
 )
@@ -21,3 +73,8 @@ Base = declarative_base()
 async def get_session():
     async with SessionLocal() as session:
         yield session
+
+
+def get_session_factory():
+    """Session factory for work that outlives the request, like streamed responses."""
+    return SessionLocal
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import zlib
+from sqlalchemy import Text, select, type_coerce
+from .models import Score
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+EXPORT_CHUNK_SIZE = 1000
+
+CSV_COLUMNS = [
+    "score_id",
+    "user_id",
+    "date",
+    "score",
+    "question_id",
+    "question",
+    "lower_bound",
+    "upper_bound",
+    "correct_answer",
+    "correct",
+]
+
+
+def _export_query(user_id: int = None, raw_details: bool = False):
+    details = type_coerce(Score.details, Text) if raw_details else Score.details
+    query = select(Score.id, Score.user_id, Score.date, Score.score, details).order_by(
+        Score.id
+    )
+    if user_id is not None:
+        query = query.where(Score.user_id == user_id)
+    return query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+
+def _ndjson_chunk(rows) -> bytes:
+    # details is passed through as the JSON text stored in the database
+    lines = [
+        f'{{"id": {score_id}, "user_id": {user_id}, '
+        f'"date": {json.dumps(date.isoformat() if date else None)}, '
+        f'"score": {score}, "details": {details}}}\n'
+        for score_id, user_id, date, score, details in rows
+    ]
+    return "".join(lines).encode()
+
+
+def _csv_chunk(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for score_id, user_id, date, score, details in rows:
+        date = date.isoformat() if date else ""
+        for result in details:
+            writer.writerow(
+                [
+                    score_id,
+                    user_id,
+                    date,
+                    score,
+                    result.get("question_id", ""),
+                    result.get("question", ""),
+                    result.get("lower_bound", ""),
+                    result.get("upper_bound", ""),
+                    result.get("correct_answer", ""),
+                    result.get("correct", ""),
+                ]
+            )
+    return buffer.getvalue().encode()
+
+
+async def export_scores(
+    session_factory, fmt: str = "ndjson", user_id: int = None, gzip: bool = False
+):
+    """Stream scores as NDJSON or CSV bytes, optionally gzip-compressed.
+
+    Rows come straight from a database cursor one partition at a time and
+    are formatted without building ORM objects, so memory does not grow with
+    the number of rows. CSV has one line per answered question, NDJSON one
+    line per attempt. The session is opened here rather than taken from a
+    request dependency, because the response is still streaming after the
+    request handler has returned.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    async with session_factory() as session:
+        result = await session.stream(
+            _export_query(user_id, raw_details=fmt == "ndjson")
+        )
+        header = True
+        async for rows in result.partitions():
+            if fmt == "ndjson":
+                chunk = _ndjson_chunk(rows)
+            else:
+                chunk = _csv_chunk(rows, header)
+                header = False
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if fmt == "csv" and header:
+            # No rows at all, still send the header line
+            chunk = _csv_chunk([], header)
+            yield compressor.compress(chunk) if compressor is not None else chunk
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def export_filename(fmt: str, gzip: bool = False) -> str:
+    extension = EXPORT_FORMATS[fmt][1]
+    return f"scores.{extension}.gz" if gzip else f"scores.{extension}"
+
+
+def export_media_type(fmt: str, gzip: bool = False) -> str:
+    return "application/gzip" if gzip else EXPORT_FORMATS[fmt][0]
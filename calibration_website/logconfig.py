@@ -0,0 +1,81 @@
+import datetime
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from .responses import dumps
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+# Fraction of high-volume events (one per /submit) that are logged
+LOG_SAMPLE_SUBMIT = float(os.getenv("LOG_SAMPLE_SUBMIT", "0.01"))
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+_JSON_TYPES = (str, int, float, bool, type(None), list, dict)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with the fields passed via ``extra``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value if isinstance(value, _JSON_TYPES) else str(value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return dumps(entry).decode("utf-8")
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a record with ``extra={"sample_rate": p}`` with probability p.
+
+    Records without a sample rate always pass. The rate stays on the record,
+    so counts can be scaled back up downstream.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        return rate is None or random.random() < rate
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> QueueListener:
+    """Route the root logger through a queue to a handler on a background thread.
+
+    Request handlers only pay for building the record and putting it on the
+    queue; formatting and writing happen on the listener's thread. Sampled-out
+    records are dropped before they reach the queue. Stop the returned
+    listener on shutdown to flush what is left.
+    """
+    handler = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    # Replaces handlers from an implicit basicConfig() by an early logging call
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    logging.getLogger("aiosqlite").setLevel(logging.WARNING)
+
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+import numpy as np
+from .metrics import Histogram, registry
+
+# Event loop lag monitor, off unless LOOP_MONITOR is set
+LOOP_MONITOR = os.getenv("LOOP_MONITOR", "False").lower() in ["true", "1"]
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+# A callback running longer than this gets its stack logged
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+LOOP_LAG_SECONDS = registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "How much later than scheduled the loop monitor woke up.",
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+
+
+class LoopMonitor:
+    """Measures event loop lag and logs what is running when the loop blocks.
+
+    A task on the loop sleeps for ``interval`` seconds and records how late it
+    wakes up. A watchdog thread checks the task's heartbeat; when it is older
+    than ``threshold`` the loop is stuck in a callback, and the watchdog logs
+    the loop thread's current stack once per stall.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, window: int = 2048):
+        self.interval = interval
+        self.threshold = threshold
+        self._lags = deque(maxlen=window)
+        self._blocks = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._watchdog.join)
+        self._watchdog = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            self._lags.append(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            self._blocks += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logging.warning(
+                "Event loop blocked for more than %.0f ms:\n%s", stalled * 1000, stack
+            )
+
+    def stats(self) -> dict:
+        lags = np.fromiter(self._lags, dtype=np.float64)
+        p50, p90, p99 = np.percentile(lags, [50, 90, 99]) if len(lags) else (0, 0, 0)
+        return {
+            "running": self.running,
+            "samples": len(lags),
+            "blocks": self._blocks,
+            "lag_p50_seconds": float(p50),
+            "lag_p90_seconds": float(p90),
+            "lag_p99_seconds": float(p99),
+            "lag_max_seconds": float(lags.max()) if len(lags) else 0.0,
+        }
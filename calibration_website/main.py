@@ -1,55 +1,165 @@
-from fastapi import FastAPI, Request, Depends, HTTPException, status, Form
-from fastapi.responses import JSONResponse, RedirectResponse, FileResponse
+from fastapi import FastAPI, Request, Depends, HTTPException, status, Form, Query
+from fastapi.responses import (
+    Response,
+    JSONResponse,
+    RedirectResponse,
+    FileResponse,
+    StreamingResponse,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
+from calibration_website.analytics import calibration_cache
+from calibration_website.assets import AssetFiles, AssetManifest
 from calibration_website.auth import (
-    get_password_hash,
+    get_password_hash_async,
     authenticate_user,
     create_access_token,
+    hashing_pool,
+    identity_cache,
+    resolve_session_user_id,
+    resolve_token_user_id,
+    tokens_enabled,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from calibration_website.database import get_session, get_session_factory, SessionLocal
+from calibration_website.export import (
+    EXPORT_FORMATS,
+    export_scores,
+    export_filename,
+    export_media_type,
+)
+from calibration_website.logconfig import LOG_SAMPLE_SUBMIT, setup_logging
+from calibration_website.loopmonitor import (
+    LoopMonitor,
+    LOOP_MONITOR,
+    LOOP_MONITOR_INTERVAL_MS,
+    LOOP_BLOCK_THRESHOLD_MS,
+)
+from calibration_website.metrics import METRICS_ENABLED, MetricsMiddleware, registry
+from calibration_website.pages import PageCache
+from calibration_website.profiling import (
+    ProfilingMiddleware,
+    PROFILE_ADMINS,
+    PROFILE_SECRET,
 )
-from calibration_website.database import get_session
-from calibration_website.models import User, Score
-from calibration_website.schemas import UserCreate, UserOut, ScoreOut
+from calibration_website.models import User, Score, UserStats, UserSeenQuestions
+from calibration_website.schemas import UserCreate, UserOut, ScorePage, UserStatsOut
+from calibration_website.questions import QuestionBank
+from calibration_website.responses import FastJSONResponse, render_score_page
+from calibration_website.sessionstore import (
+    ServerSessionMiddleware,
+    make_session_backend,
+    sweep_sessions,
+    SESSION_BACKEND,
+    SESSION_MAX_AGE,
+    SESSION_SWEEP_SECONDS,
+)
+from calibration_website.selection import question_selectors, seen_questions
+from calibration_website.stats import record_attempt, get_user_stats
+from calibration_website.submissions import (
+    BatchTooLarge,
+    attempt_error,
+    calculate_score,
+    iter_list,
+    iter_ndjson,
+    submit_batch,
+)
+from calibration_website.writebehind import (
+    ScoreWriter,
+    SCORE_WRITE_BEHIND,
+    SCORE_BATCH_SIZE,
+    SCORE_FLUSH_MS,
+    SCORE_QUEUE_SIZE,
+    SCORE_WRITE_DURABILITY,
+)
+from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import Text, select, delete, tuple_, type_coerce
+from sqlalchemy.orm.attributes import set_committed_value
+import asyncio
 import os
-import json
-import random
 import logging
+import tempfile
 from dotenv import load_dotenv
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 import datetime
 
 load_dotenv()
 
+# Number of questions in one quiz
+QUIZ_SIZE = 10
+
+# Page sizes for the score history (profile page and API)
+SCORE_PAGE_SIZE = 20
+SCORE_PAGE_MAX_SIZE = 100
+
 
 DEBUG = os.getenv("DEBUG", "False").lower() in [
     "true",
     "1",
 ]  # This converts the DEBUG environment variable to a boolean
 
-if DEBUG:
-    logging.basicConfig(level=logging.DEBUG)
-    logging.getLogger("aiosqlite").setLevel(logging.WARNING)
-    logging.warning("Running in DEBUG mode")
 
-app = FastAPI()
+score_writer = ScoreWriter(
+    SessionLocal,
+    batch_size=SCORE_BATCH_SIZE,
+    flush_interval=SCORE_FLUSH_MS / 1000,
+    wait_for_commit=SCORE_WRITE_DURABILITY == "commit",
+    max_queue=SCORE_QUEUE_SIZE,
+    seen_questions=seen_questions,
+)
+
+
+session_backend = make_session_backend(SESSION_BACKEND, SessionLocal)
 
+loop_monitor = LoopMonitor(
+    interval=LOOP_MONITOR_INTERVAL_MS / 1000,
+    threshold=LOOP_BLOCK_THRESHOLD_MS / 1000,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = setup_logging(level="DEBUG") if DEBUG else setup_logging()
+    if DEBUG:
+        logging.warning("Running in DEBUG mode")
+    if SCORE_WRITE_BEHIND:
+        await score_writer.start()
+    if LOOP_MONITOR:
+        await loop_monitor.start()
+    sweeper = asyncio.create_task(
+        sweep_sessions(session_backend, SESSION_SWEEP_SECONDS)
+    )
+    yield
+    sweeper.cancel()
+    await loop_monitor.stop()
+    # Drain queued scores before the process exits
+    await score_writer.stop()
+    hashing_pool.shutdown()
+    log_listener.stop()
 
-# Static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+
+# Static files, fingerprinted and precompressed by scripts/build_static.py
+app.mount("/static", AssetFiles(directory="static"), name="static")
+assets = AssetManifest("static")
 
 # Templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = assets.url
+# Pages that only depend on a few context values are rendered once and cached
+pages = PageCache(templates.env)
 
 
 # Configure rate limiter
 
-# Load questions from a JSON file
-with open("questions.json", "r") as f:
-    questions = json.load(f)
+# Load questions from a JSON file, reloaded whenever the file changes
+question_bank = QuestionBank(
+    "questions.json",
+    check_interval=float(os.getenv("QUESTIONS_CHECK_INTERVAL", "1.0")),
+)
 # Add SessionMiddleware
 
 
@@ -62,23 +172,32 @@ app.add_middleware(
     allow_headers=["*"],  # You can specify allowed headers here
 )
 
+# On-demand profiling of single requests, inside the session middleware so
+# it can check the username of ?_profile=1 requests
+if PROFILE_SECRET or PROFILE_ADMINS:
+    app.add_middleware(ProfilingMiddleware)
 
+# The cookie only carries a session id, static files skip the session lookup
 app.add_middleware(
-    SessionMiddleware,
-    secret_key=os.getenv("SECRET_KEY", "your_secret_key"),
-    max_age=86400,  # Session will expire after 1 hour
+    ServerSessionMiddleware,
+    backend=session_backend,
+    max_age=SESSION_MAX_AGE,
+    skip_prefixes=("/static/", "/favicon.ico"),
 )
 
+# Added last so it is the outermost middleware and times the whole request
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.get("/login")
-async def login_page(request: Request):
-    return templates.TemplateResponse("login-page.html", {"request": request})
+async def login_page(request: Request, redirect: str = "/"):
+    return pages.response(request, "login-page.html", redirect=redirect)
 
 
 @app.get("/register")
 async def register_page(request: Request):
-    response = templates.TemplateResponse("register-page.html", {"request": request})
-    return response
+    return pages.response(request, "register-page.html")
 
 
 async def check_user_exists(db: AsyncSession, username: str) -> bool:
@@ -89,7 +208,7 @@ async def check_user_exists(db: AsyncSession, username: str) -> bool:
 
 async def create_user_in_db(db: AsyncSession, user_create: UserCreate) -> User:
     """Create a new user in the database."""
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     assert user_create.date_of_birth is None or isinstance(
         user_create.date_of_birth, datetime.date
     )
@@ -104,6 +223,8 @@ async def create_user_in_db(db: AsyncSession, user_create: UserCreate) -> User:
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
+    # A fresh user has no scores, so there is nothing to load
+    set_committed_value(new_user, "scores", [])
     return new_user
 
 
@@ -112,25 +233,25 @@ async def create_user(
     user: UserCreate,
     db: AsyncSession = Depends(get_session),
 ):
-    logging.debug(f"Creating user: {user}")
+    logging.debug("Creating user: %s", user)
 
     try:
         # Check if username already exists
-        logging.debug(f"Check DB for existing user: {user.username}")
+        logging.debug("Check DB for existing user: %s", user.username)
         if await check_user_exists(db, user.username):
-            logging.warning(f"Username already registered: {user.username}")
+            logging.warning("Username already registered: %s", user.username)
             raise HTTPException(status_code=409, detail="Username already registered")
 
         # Create new user
         new_user = await create_user_in_db(db, user)
-        logging.info(f"User created successfully: {user.username}")
+        logging.info("User created successfully: %s", user.username)
         return new_user
 
     except HTTPException as e:
         raise e
 
-    except Exception as e:
-        logging.error(f"Error creating user: {e}")
+    except Exception:
+        logging.exception("Error creating user")
         await db.rollback()
         raise HTTPException(status_code=500, detail="Error creating user")
 
@@ -149,85 +270,263 @@ async def login_for_access_token(
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
     request.session["is_authenticated"] = True
     request.session["username"] = user.username
+    request.session["user_id"] = user.id
+    identity_cache.set(user.id, user.username)
     # this line is maybe not necessary
-    request.session["access_token"] = access_token  # Store the token in the session
+    if tokens_enabled():
+        access_token = create_access_token(data={"sub": user.username, "uid": user.id})
+        request.session["access_token"] = access_token  # Store the token in the session
     # Perform the redirection after setting the session
     return RedirectResponse(url=redirect_url, status_code=status.HTTP_303_SEE_OTHER)
 
 
+@app.post("/api/token")
+async def issue_api_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_session),
+):
+    """OAuth2 password flow for scripted clients, returns a Bearer token."""
+    if not tokens_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token authentication is not configured",
+        )
+    user = await authenticate_user(form_data.username, form_data.password, db)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    identity_cache.set(user.id, user.username)
+    access_token = create_access_token(
+        data={"sub": user.username, "uid": user.id},
+        expires_delta=datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
 @app.get("/logout")
 async def logout(request: Request):
     request.session.clear()
     return RedirectResponse(url="/")
 
 
+async def get_current_user_id(
+    request: Request, db: AsyncSession = Depends(get_session)
+):
+    """Id of the logged-in user, or None for anonymous requests.
+
+    API clients authenticate with ``Authorization: Bearer <token>`` from
+    /api/token; an invalid or expired token is rejected rather than treated
+    as anonymous, so scores are never silently dropped.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer":
+        user_id = await resolve_token_user_id(token.strip(), db)
+        if user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return user_id
+    return await resolve_session_user_id(request.session, db)
+
+
 @app.get("/profile")
-async def profile(request: Request, db: AsyncSession = Depends(get_session)):
-    if not request.session.get("is_authenticated"):
+async def profile(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_session),
+):
+    if user_id is None:
         return RedirectResponse(url="/")
 
-    username = request.session.get("username")
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
-
+    user = await db.get(User, user_id)
     if not user:
         return RedirectResponse(url="/")
 
+    # Only the first page is rendered, the rest is fetched on demand
+    scores, next_cursor = await fetch_score_page(db, user.id, SCORE_PAGE_SIZE)
+
     return templates.TemplateResponse(
         "profile.html",
-        {"request": request, "user": user},
+        {
+            "request": request,
+            "user": user,
+            "scores": scores,
+            "next_cursor": next_cursor,
+            "page_size": SCORE_PAGE_SIZE,
+        },
     )
 
 
 @app.delete("/profile")
 async def delete_profile(
     request: Request,
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_session),
 ):
-    if not request.session.get("is_authenticated"):
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
         )
 
-    username = request.session.get("username")
-
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
-
-    await db.execute(delete(User).where(User.id == user.id))
+    await db.execute(delete(Score).where(Score.user_id == user_id))
+    await db.execute(delete(UserStats).where(UserStats.user_id == user_id))
+    await db.execute(
+        delete(UserSeenQuestions).where(UserSeenQuestions.user_id == user_id)
+    )
+    await db.execute(delete(User).where(User.id == user_id))
     await db.commit()
+    identity_cache.pop(user_id)
+    seen_questions.forget(user_id)
 
     request.session.clear()
 
     return JSONResponse(content={"detail": "User profile deleted successfully"})
 
 
-@app.get("/api/score-history", response_model=list[ScoreOut])
-async def get_score_history(request: Request, db: AsyncSession = Depends(get_session)):
-    if not request.session.get("is_authenticated"):
+def encode_cursor(date: datetime.datetime, score_id: int) -> str:
+    """Encode the position of the last returned score as an opaque cursor."""
+    return f"{date.isoformat()}_{score_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    try:
+        date, score_id = cursor.rsplit("_", 1)
+        return datetime.datetime.fromisoformat(date), int(score_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def fetch_score_page(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    cursor: str = None,
+    include_details: bool = False,
+):
+    """Fetch one page of a user's scores, newest first, keyed on (date, id).
+
+    Returns the rows and the cursor of the next page, or None on the last page.
+    """
+    columns = [Score.id, Score.score, Score.date]
+    if include_details:
+        # Raw JSON text, copied into the response without a parse round trip
+        columns.append(type_coerce(Score.details, Text).label("details"))
+    query = (
+        select(*columns)
+        .where(Score.user_id == user_id)
+        .order_by(Score.date.desc(), Score.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        query = query.where(tuple_(Score.date, Score.id) < after)
+
+    result = await db.execute(query)
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+    return rows, next_cursor
+
+
+@app.get("/api/score-history", response_model=ScorePage)
+async def get_score_history(
+    request: Request,
+    cursor: str = None,
+    limit: int = Query(SCORE_PAGE_SIZE, ge=1, le=SCORE_PAGE_MAX_SIZE),
+    include_details: bool = False,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_session),
+):
+    if user_id is None:
         raise HTTPException(status_code=403, detail="Not authenticated")
 
-    username = request.session.get("username")
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
+    scores, next_cursor = await fetch_score_page(
+        db, user_id, limit, cursor=cursor, include_details=include_details
+    )
+    # Rows go straight to bytes, response_model only documents the shape
+    return Response(
+        content=render_score_page(scores, next_cursor), media_type="application/json"
+    )
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    scores_result = await db.execute(
-        select(Score).where(Score.user_id == user.id).order_by(Score.date.desc())
+@app.get("/api/export")
+async def export_own_scores(
+    format: str = "ndjson",
+    gzip: bool = False,
+    user_id: int = Depends(get_current_user_id),
+    session_factory=Depends(get_session_factory),
+):
+    """Download all of the logged-in user's attempts as NDJSON or CSV."""
+    if user_id is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown export format")
+
+    filename = export_filename(format, gzip)
+    return StreamingResponse(
+        export_scores(session_factory, format, user_id=user_id, gzip=gzip),
+        media_type=export_media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    scores = scores_result.scalars().all()
 
-    return scores
+
+@app.get("/api/stats", response_model=UserStatsOut)
+async def get_stats(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_session),
+):
+    if user_id is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+
+    return await get_user_stats(db, user_id)
+
+
+@app.get("/api/analytics/calibration")
+async def get_calibration_analytics(
+    user_id: int = Depends(get_current_user_id),
+    session_factory=Depends(get_session_factory),
+):
+    """Hit rates across all stored attempts, refreshed at most every few minutes."""
+    if user_id is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    return await calibration_cache.get(session_factory, await question_bank.current())
+
+
+@app.get("/api/hashing-pool")
+async def get_hashing_pool_stats(user_id: int = Depends(get_current_user_id)):
+    """Queue depth and wait times of the password hashing pool."""
+    if user_id is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    return hashing_pool.stats()
+
+
+@app.get("/api/event-loop")
+async def get_event_loop_stats(user_id: int = Depends(get_current_user_id)):
+    """Event loop lag percentiles and blocking callbacks seen by the monitor."""
+    if user_id is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    return loop_monitor.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Request, database and bcrypt metrics in the Prometheus text format."""
+    return Response(
+        content=registry.render(), media_type="text/plain; version=0.0.4"
+    )
 
 
 @app.get("/check-auth")
@@ -255,13 +554,13 @@ async def get_user(request: Request, redirect: bool = True) -> dict:
 
 @app.get("/")
 async def main_get(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return pages.response(request, "index.html")
 
 
 @app.head("/")
 async def main_head(request: Request):
-    # Return an empty response for HEAD requests
-    return templates.TemplateResponse("index.html", {"request": request})
+    # Same headers as GET, without the body
+    return pages.response(request, "index.html")
 
 
 @app.get("/favicon.ico")
@@ -273,13 +572,27 @@ async def favicon():
 
 @app.get("/imprint")
 async def imprint(request: Request):
-    return templates.TemplateResponse("imprint.html", {"request": request})
+    return pages.response(request, "imprint.html")
 
 
 @app.get("/questions")
-def get_questions():
-    random_questions = random.sample(questions, 10)
-    return JSONResponse(content=random_questions)
+async def get_questions(
+    exclude_seen: bool = False,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_session),
+):
+    question_index = await question_bank.current()
+    # Difficulty strata use the last analytics run, never trigger a new one
+    selector = question_selectors.get(
+        question_index, calibration_cache.latest(question_index)
+    )
+    seen = 0
+    if exclude_seen and user_id is not None:
+        seen = await seen_questions.get(db, user_id)
+    positions = selector.select(QUIZ_SIZE, seen)
+    return Response(
+        content=question_index.render_json(positions), media_type="application/json"
+    )
 
 
 @app.get("/questionnaire")
@@ -293,94 +606,124 @@ async def questionnaire(request: Request):
 
 @app.get("/how-to-improve")
 async def how_to_improve(request: Request, user=Depends(get_user)):
-    return templates.TemplateResponse(
+    return pages.response(
+        request,
         "how-to-improve.html",
-        {"request": request, "user_is_authenticated": user["user_is_authenticated"]},
+        user_is_authenticated=user["user_is_authenticated"],
     )
 
 
 @app.post("/submit")
-async def submit(request: Request, db: AsyncSession = Depends(get_session)):
+async def submit(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_session),
+):
     data = await request.json()
+    # One snapshot of the bank for the whole request, even across a reload
+    question_index = await question_bank.current()
 
-    error_response = validate_input_data(data)
+    error_response = validate_input_data(data, question_index)
     if error_response:
         return error_response
 
-    selected_questions = data.get("questions")
+    question_ids = data.get("question_ids")
     answers = data.get("answers")
 
-    score, detailed_results = calculate_score(selected_questions, answers)
+    score, detailed_results, metrics = calculate_score(
+        question_ids, answers, question_index
+    )
 
     # Save results to database if user is authenticated
-    username = request.session.get("username")
-    if username:
-        result = await db.execute(select(User).where(User.username == username))
-        user = result.scalars().first()
-        db_score = Score(score=score, details=detailed_results, user_id=user.id)
-        db.add(db_score)
-        await db.commit()
-        await db.refresh(db_score)
+    if user_id is not None:
+        date = datetime.datetime.now(datetime.timezone.utc)
+        if score_writer.running:
+            # Batched together with other submissions by the background writer
+            await score_writer.submit(user_id, score, detailed_results, date)
+        else:
+            db_score = Score(
+                score=score, details=detailed_results, user_id=user_id, date=date
+            )
+            db.add(db_score)
+            # The summary row is updated in the same transaction as the insert
+            await record_attempt(db, user_id, score, detailed_results, date)
+            await seen_questions.add(db, user_id, question_ids)
+            await db.commit()
 
     response_data = {
         "score": float(score),
         "detailed_results": detailed_results,
+        "metrics": metrics,
     }
-    print(response_data)
-    return JSONResponse(content=response_data)
+    logging.info(
+        "Scored submission",
+        extra={
+            "event": "submit",
+            "sample_rate": LOG_SAMPLE_SUBMIT,
+            "user_id": user_id,
+            "questions": len(question_ids),
+            "score": float(score),
+        },
+    )
+    return FastJSONResponse(content=response_data)
 
 
-def validate_input_data(data):
-    if not data:
-        return JSONResponse(content={"error": "No data provided"}, status_code=400)
-    if "questions" not in data or "answers" not in data:
-        return JSONResponse(
-            content={"error": "Questions or answers missing"}, status_code=400
-        )
-    if not isinstance(data["questions"], list) or not isinstance(data["answers"], dict):
-        return JSONResponse(
-            content={"error": "Incorrect data types for questions or answers"},
-            status_code=400,
-        )
+@app.post("/api/submit-batch")
+async def submit_attempt_batch(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_session),
+):
+    """Score and store many attempts at once, for uploads of offline sessions.
 
-    for i, question in enumerate(data["questions"]):
-        if f"lower_{i}" not in data["answers"] or f"upper_{i}" not in data["answers"]:
-            return JSONResponse(
-                content={"error": f"Bounds for question {i} not provided"},
-                status_code=400,
-            )
+    The body is a JSON list of attempts like /submit takes, each optionally
+    with an ISO ``date``, or the same attempts as NDJSON
+    (Content-Type: application/x-ndjson), which is read as a stream.
+    """
+    if user_id is None:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    question_index = await question_bank.current()
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        attempts = iter_ndjson(request.stream())
+    else:
         try:
-            float(data["answers"][f"lower_{i}"])
-            float(data["answers"][f"upper_{i}"])
+            data = await request.json()
         except ValueError:
-            return JSONResponse(
-                content={"error": f"Non-numeric bounds provided for question {i}"},
-                status_code=400,
-            )
-
-    return None
+            raise HTTPException(status_code=400, detail="Body is not valid JSON")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="Expected a list of attempts")
+        attempts = iter_list(data)
 
-
-def calculate_score(selected_questions, answers):
-    correct_count = 0
-    detailed_results = []
-    for i, question_answer_d in enumerate(selected_questions):
-        lower = float(answers.get(f"lower_{i}"))
-        upper = float(answers.get(f"upper_{i}"))
-        correct = lower <= question_answer_d["answer"] <= upper
-        detailed_results.append(
-            {
-                "question": question_answer_d["question"],
-                "correct": correct,
-                "correct_answer": question_answer_d["answer"],
-                "lower_bound": lower,
-                "upper_bound": upper,
-            }
+    # Results of large batches spill to disk instead of growing in memory
+    results = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    try:
+        accepted, rejected = await submit_batch(
+            db, user_id, attempts, question_index, results, seen_questions
         )
-        if correct:
-            correct_count += 1
-    score = round((correct_count / len(selected_questions)) * 100)
-    return score, detailed_results
+    except BatchTooLarge as e:
+        results.close()
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        results.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        with results:
+            yield b'{"accepted":%d,"rejected":%d,"results":[' % (accepted, rejected)
+            results.seek(0)
+            while chunk := results.read(64 * 1024):
+                yield chunk
+            yield b"]}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+def validate_input_data(data, question_index):
+    error = attempt_error(data, question_index)
+    if error:
+        return JSONResponse(content={"error": error}, status_code=400)
+    return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+import bisect
+import os
+import time
+from sqlalchemy import event
+
+# Request, query and bcrypt metrics for /metrics, on unless METRICS_ENABLED=false
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ["true", "1"]
+
+# Upper bounds in seconds, from a cached page to a slow bcrypt burst
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in the Prometheus text format.
+
+    Metrics are updated from the event loop only, so there is no locking.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, like a Prometheus histogram."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            # Bucket counts, then the +Inf count, then the sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(self.labelnames + ("le",), labels + (bound,)),
+                    cumulative,
+                )
+            names = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", names, series[-1]
+            yield f"{self.name}_count", names, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from request start to the end of the response body.",
+        ("method", "route"),
+    )
+)
+REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "Finished HTTP requests by status code.",
+        ("method", "route", "status"),
+    )
+)
+QUERY_SECONDS = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Time spent executing database statements, by statement type.",
+        ("statement",),
+    )
+)
+BCRYPT_SECONDS = registry.register(
+    Histogram(
+        "bcrypt_duration_seconds",
+        "Time a worker spent hashing or verifying a password.",
+        ("operation",),
+    )
+)
+BCRYPT_WAIT_SECONDS = registry.register(
+    Histogram(
+        "bcrypt_wait_seconds",
+        "Time a bcrypt call waited for a free worker.",
+        ("operation",),
+    )
+)
+BCRYPT_REJECTED = registry.register(
+    Counter(
+        "bcrypt_rejected_total",
+        "bcrypt calls rejected with a 503 because the hashing pool was full.",
+    )
+)
+
+
+def route_label(scope) -> str:
+    """The route's path template, so /api/x?id=1 and /api/x?id=2 share a series."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounts (static files) and 404s are not labeled per path to bound cardinality
+    return "other"
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records latency and status of every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_label(scope)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, scope["method"], route
+            )
+            REQUESTS.inc(scope["method"], route, str(status_code))
+
+
+def statement_type(statement: str) -> str:
+    words = statement.split(None, 1)
+    keyword = words[0].upper() if words else ""
+    if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "WITH"):
+        return keyword
+    return "OTHER"
+
+
+def instrument_engine(engine):
+    """Time every statement the engine runs via cursor execute events."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def record_query_time(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is not None:
+            QUERY_SECONDS.observe(time.perf_counter() - start, statement_type(statement))
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, String, JSON
+from sqlalchemy import (
+    Column,
+    Integer,
+    ForeignKey,
+    Float,
+    DateTime,
+    String,
+    JSON,
+    Index,
+    LargeBinary,
+)
 from sqlalchemy.orm import relationship
 import datetime
 from .database import Base
@@ -25,7 +35,7 @@ class User(Base):
         "Score",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",  # Use selectinload to pre-load related data
+        lazy="raise",  # Scores are loaded explicitly where they are rendered
     )
 
 
@@ -35,7 +45,41 @@ class Score(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     score = Column(Float, nullable=False)
-    date = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    date = Column(
+        DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc)
+    )
     details = Column(JSON, nullable=False)  # Store detailed results as JSON
 
     user = relationship("User", back_populates="scores")
+
+
+# Serves per-user history queries ordered newest first, ties broken by id
+Index("ix_scores_user_id_date_id", Score.user_id, Score.date.desc(), Score.id.desc())
+
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    total_hits = Column(Integer, nullable=False, default=0)  # Bounds that held
+    total_questions = Column(Integer, nullable=False, default=0)
+    mean_score = Column(Float, nullable=False, default=0.0)
+    best_score = Column(Float, nullable=True)
+    last_score = Column(Float, nullable=True)
+    last_attempt_date = Column(DateTime, nullable=True)
+
+
+class UserSeenQuestions(Base):
+    __tablename__ = "user_seen_questions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    bits = Column(LargeBinary, nullable=False)  # Bit n set: question id n was asked
+
+
+class WebSession(Base):
+    __tablename__ = "web_sessions"
+
+    id = Column(String, primary_key=True)  # Opaque id from the session cookie
+    data = Column(JSON, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
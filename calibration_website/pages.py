@@ -0,0 +1,54 @@
+import hashlib
+from fastapi import Request
+from fastapi.responses import Response
+from jinja2 import Environment
+from .cache import TTLCache
+
+
+class PageCache:
+    """Rendered template pages with strong ETags, keyed by template and context.
+
+    Only for pages whose output depends on nothing but the few context values
+    passed in, which must be hashable. Entries expire after ``ttl`` seconds so
+    edited templates show up without a restart.
+    """
+
+    def __init__(self, env: Environment, maxsize: int = 256, ttl: float = 300.0):
+        self.env = env
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def render(self, template_name: str, **context) -> tuple[bytes, str]:
+        key = (template_name, tuple(sorted(context.items())))
+        page = self._cache.get(key)
+        if page is None:
+            body = self.env.get_template(template_name).render(**context).encode()
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            page = (body, etag)
+            self._cache.set(key, page)
+        return page
+
+    def response(self, request: Request, template_name: str, **context) -> Response:
+        """The page as a full response, a 304 or a body-less HEAD response."""
+        body, etag = self.render(template_name, **context)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Cookie"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            return Response(media_type="text/html", headers=headers)
+        return Response(content=body, media_type="text/html", headers=headers)
+
+    def clear(self):
+        self._cache.clear()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
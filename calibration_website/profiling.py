@@ -0,0 +1,166 @@
+import asyncio
+import cProfile
+import datetime
+import hashlib
+import hmac
+import html
+import io
+import logging
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from urllib.parse import parse_qs
+from starlette.responses import HTMLResponse
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # cProfile is used instead
+    Profiler = None
+
+# Secret for X-Profile-Token headers; profiling by header is off without it
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+# Usernames that may profile a request with the ?_profile=1 query flag
+PROFILE_ADMINS = {
+    name.strip() for name in os.getenv("PROFILE_ADMINS", "").split(",") if name.strip()
+}
+# Reports are written here if set, otherwise returned instead of the response
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_QUERY_FLAG = "_profile"
+MEMORY_QUERY_FLAG = "_profile_memory"
+
+
+def sign_profile_token(secret: str, expires: int) -> str:
+    """A token for the X-Profile-Token header, valid until ``expires`` (unix time)."""
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256)
+    return f"{expires}:{signature.hexdigest()}"
+
+
+def verify_profile_token(secret: str, token: str) -> bool:
+    expires, _, _ = token.partition(":")
+    if not secret or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(token, sign_profile_token(secret, int(expires)))
+
+
+class ProfilingMiddleware:
+    """Profiles single requests on demand, costs a header lookup otherwise.
+
+    A request is profiled if it carries a valid X-Profile-Token header or if
+    a user listed in PROFILE_ADMINS adds ``?_profile=1``; ``_profile_memory=1``
+    adds a tracemalloc report. pyinstrument is used when it is installed.
+    cProfile sees everything the loop runs meanwhile, including other
+    requests, so only one request is profiled at a time. Must be added before
+    SessionMiddleware so the session is available.
+    """
+
+    def __init__(
+        self,
+        app,
+        secret: str = PROFILE_SECRET,
+        admins=PROFILE_ADMINS,
+        output_dir: str = PROFILE_DIR,
+    ):
+        self.app = app
+        self.secret = secret
+        self.admins = set(admins)
+        self.output_dir = output_dir
+        self._lock = asyncio.Lock()
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return verify_profile_token(self.secret, value.decode("latin-1"))
+        if not self.admins or PROFILE_QUERY_FLAG.encode() not in scope["query_string"]:
+            return False
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        username = scope.get("session", {}).get("username")
+        return query.get(PROFILE_QUERY_FLAG) == ["1"] and username in self.admins
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope) or self._lock.locked():
+            await self.app(scope, receive, send)
+            return
+
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        trace_memory = query.get(MEMORY_QUERY_FLAG) == ["1"]
+        async with self._lock:
+            report = await self._profile(scope, receive, send, trace_memory)
+        if not self.output_dir:
+            await HTMLResponse(report)(scope, receive, send)
+
+    async def _profile(self, scope, receive, send, trace_memory: bool) -> str:
+        async def discard(message):
+            pass
+
+        # With an output directory the client gets its normal response
+        target_send = send if self.output_dir else discard
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        profiler = _start_profiler()
+        try:
+            await self.app(scope, receive, target_send)
+        finally:
+            _stop_profiler(profiler)
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot() if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+
+        report = render_report(scope, profiler, elapsed, snapshot)
+        if self.output_dir:
+            self._write(scope, report)
+        return report
+
+    def _write(self, scope, report: str):
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path_part = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        path = os.path.join(
+            self.output_dir, f"{timestamp}-{scope['method']}-{path_part}.html"
+        )
+        with open(path, "w") as f:
+            f.write(report)
+        logging.info("Wrote request profile to %s", path)
+
+
+def _start_profiler():
+    if Profiler is not None:
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler):
+    if Profiler is not None:
+        profiler.stop()
+    else:
+        profiler.disable()
+
+
+def render_report(scope, profiler, elapsed: float, snapshot=None) -> str:
+    """An HTML page with the profile and, if taken, the top allocations."""
+    title = html.escape(f"{scope['method']} {scope['path']} in {elapsed * 1000:.1f} ms")
+    memory = ""
+    if snapshot is not None:
+        top = snapshot.statistics("lineno")[:25]
+        lines = "\n".join(html.escape(str(stat)) for stat in top)
+        memory = f"<h2>Top allocations</h2><pre>{lines}</pre>"
+
+    if Profiler is not None:
+        # pyinstrument's own page, an interactive call tree
+        return profiler.output_html() + memory
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(60)
+    return (
+        f"<html><head><title>{title}</title></head><body><h1>{title}</h1>"
+        f"<pre>{html.escape(stream.getvalue())}</pre>{memory}</body></html>"
+    )
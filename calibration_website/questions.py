@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import numpy as np
+
+
+class QuestionIndex:
+    """The question bank as a text table plus a contiguous array of answers.
+
+    Questions are addressed by their stable ``id`` from questions.json, so the
+    client only ever sees ids and question texts, never the answers. The JSON
+    a client gets for each question is serialized once up front, so a quiz is
+    answered by joining cached fragments.
+    """
+
+    def __init__(self, questions: list[dict]):
+        self.ids = [question["id"] for question in questions]
+        self.texts = [question["question"] for question in questions]
+        self.categories = [
+            question.get("category", "general") for question in questions
+        ]
+        self.answers = np.array(
+            [question["answer"] for question in questions], dtype=np.float64
+        )
+        self.fragments = [
+            json.dumps({"id": question_id, "question": text}).encode()
+            for question_id, text in zip(self.ids, self.texts)
+        ]
+        self._positions = {question_id: i for i, question_id in enumerate(self.ids)}
+        if len(self._positions) != len(self.ids):
+            raise ValueError("Question ids in the question bank are not unique")
+
+    @classmethod
+    def from_file(cls, path: str) -> "QuestionIndex":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, question_id):
+        return question_id in self._positions
+
+    def sample_positions(self, k: int) -> list[int]:
+        """Rows of ``k`` distinct random questions, in O(k) for any bank size."""
+        return random.sample(range(len(self.ids)), min(k, len(self.ids)))
+
+    def sample(self, k: int) -> list[dict]:
+        """Pick ``k`` distinct questions, without their answers."""
+        return [
+            {"id": self.ids[i], "question": self.texts[i]}
+            for i in self.sample_positions(k)
+        ]
+
+    def sample_json(self, k: int) -> bytes:
+        """Like sample, but already serialized as a JSON array."""
+        return self.render_json(self.sample_positions(k))
+
+    def render_json(self, positions) -> bytes:
+        return b"[" + b", ".join(self.fragments[i] for i in positions) + b"]"
+
+    def positions(self, question_ids) -> list[int]:
+        """Row numbers of the given ids; raises KeyError for unknown ids."""
+        return [self._positions[question_id] for question_id in question_ids]
+
+
+class QuestionBank:
+    """Serves the current QuestionIndex and reloads it when the file changes.
+
+    The file's mtime is checked at most every ``check_interval`` seconds. A
+    changed file is parsed in a worker thread and swapped in with a single
+    assignment, so requests keep using the old index until the new one is
+    complete. A file that fails to parse is logged and the old index stays;
+    write new banks to a temporary file and rename it into place.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._mtime = os.stat(path).st_mtime_ns
+        self.index = QuestionIndex.from_file(path)
+        self._next_check = time.monotonic() + check_interval
+
+    async def current(self) -> QuestionIndex:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            await self._reload_if_changed()
+        return self.index
+
+    async def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            logging.exception("Cannot stat question bank %s", self.path)
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            index = await asyncio.to_thread(QuestionIndex.from_file, self.path)
+        except (OSError, ValueError, KeyError, TypeError):
+            logging.exception("Keeping previous question bank, reload failed")
+            return
+        self._mtime = mtime
+        self.index = index
+        logging.info("Reloaded question bank with %d questions", len(index))
@@ -0,0 +1,52 @@
+import datetime
+import json
+from fastapi.responses import JSONResponse
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Falls back to the json module, just slower
+    orjson = None
+
+
+def _default(value):
+    """Types the json module cannot serialize on its own, as orjson does them."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Serialize to compact JSON bytes, with orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with dumps; the app's default response class."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def render_score_page(rows, next_cursor: str = None) -> bytes:
+    """A ScorePage body straight from (id, score, date[, details]) rows.
+
+    ``details``, when selected, must be the raw JSON text of the column; it is
+    copied into the body without being parsed.
+    """
+    items = []
+    for row in rows:
+        details = row[3].encode("utf-8") if len(row) > 3 and row[3] else b"null"
+        items.append(
+            b'{"id":%d,"score":%b,"date":%b,"details":%b}'
+            % (row[0], dumps(float(row[1])), dumps(row[2]), details)
+        )
+    return b'{"items":[%b],"next_cursor":%b}' % (b",".join(items), dumps(next_cursor))
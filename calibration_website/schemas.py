@@ -7,12 +7,17 @@ class ScoreOut(BaseModel):
     id: int
     score: float
     date: datetime
-    details: dict
+    details: Optional[list] = None  # Only filled in when explicitly requested
 
     class Config:
         orm_mode = True
 
 
+class ScorePage(BaseModel):
+    items: list[ScoreOut]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for the next page
+
+
 class UserCreate(BaseModel):
     username: str
     password: str
@@ -28,7 +33,7 @@ class Score(BaseModel):
     id: int
     score: float
     date: datetime
-    details: dict  # Assuming details are stored as JSON, map them to a Python dict
+    details: list  # Detailed per-question results are stored as a JSON list
 
     class Config:
         orm_mode = True
@@ -48,3 +53,14 @@ class UserOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class UserStatsOut(BaseModel):
+    attempt_count: int
+    total_hits: int
+    total_questions: int
+    hit_rate: Optional[float] = None
+    mean_score: Optional[float] = None
+    best_score: Optional[float] = None
+    last_score: Optional[float] = None
+    last_attempt_date: Optional[datetime] = None
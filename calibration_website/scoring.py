@@ -0,0 +1,87 @@
+import math
+import numpy as np
+
+# The questionnaire asks for 90% confidence intervals
+DEFAULT_ALPHA = 0.1
+
+# Floor for answer magnitudes and relative widths, keeps logs and ratios finite
+_EPSILON = 1e-12
+
+
+def score_intervals(lower, upper, truth, alpha: float = DEFAULT_ALPHA) -> dict:
+    """Score interval estimates against the true answers in one pass.
+
+    ``lower``, ``upper`` and ``truth`` are arrays of the same shape: ``(n,)``
+    for a single attempt of n questions or ``(m, n)`` for a batch of m
+    attempts. Per-question results keep that shape, per-attempt metrics
+    reduce over the last axis.
+
+    Widths and interval scores are divided by the magnitude of the answer so
+    that questions about populations and about years weigh the same.
+
+    - ``hits``: whether each interval contains its answer
+    - ``coverage``: fraction of hits
+    - ``mean_log_width``: mean log10 of the interval width relative to the answer
+    - ``interval_score``: mean Winkler interval score relative to the answer
+    - ``overconfidence``: nominal coverage minus coverage, positive when the
+      intervals are too narrow and negative when they are too wide
+    """
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+    truth = np.asarray(truth, dtype=np.float64)
+
+    scale = np.maximum(np.abs(truth), _EPSILON)
+    width = np.maximum(upper - lower, 0.0)
+    below = np.maximum(lower - truth, 0.0)
+    above = np.maximum(truth - upper, 0.0)
+    hits = (below == 0.0) & (above == 0.0)
+
+    coverage = hits.mean(axis=-1)
+    relative_width = np.maximum(width / scale, _EPSILON)
+    winkler = (width + (2.0 / alpha) * (below + above)) / scale
+
+    return {
+        "hits": hits,
+        "coverage": coverage,
+        "mean_log_width": np.log10(relative_width).mean(axis=-1),
+        "interval_score": winkler.mean(axis=-1),
+        "overconfidence": (1.0 - alpha) - coverage,
+    }
+
+
+def score_attempt(lower, upper, truth, alpha: float = DEFAULT_ALPHA) -> dict:
+    """score_intervals for one attempt, in plain Python.
+
+    Takes lists of floats and returns ``hits`` as a list and the metrics as
+    floats. For the ten questions of one quiz numpy's per-call overhead costs
+    more than the arithmetic, so /submit scores with this instead.
+    """
+    hits = []
+    log_width_total = winkler_total = 0.0
+    penalty = 2.0 / alpha
+    for low, high, answer in zip(lower, upper, truth):
+        scale = abs(answer) if abs(answer) > _EPSILON else _EPSILON
+        width = high - low if high > low else 0.0
+        # Distance from the interval, zero for a hit
+        if low > answer:
+            miss = low - answer
+        elif answer > high:
+            miss = answer - high
+        else:
+            miss = 0.0
+        hits.append(miss == 0.0)
+        relative_width = width / scale
+        log_width_total += math.log10(
+            relative_width if relative_width > _EPSILON else _EPSILON
+        )
+        winkler_total += (width + penalty * miss) / scale
+
+    n = len(hits)
+    coverage = sum(hits) / n
+    return {
+        "hits": hits,
+        "coverage": coverage,
+        "mean_log_width": log_width_total / n,
+        "interval_score": winkler_total / n,
+        "overconfidence": (1.0 - alpha) - coverage,
+    }
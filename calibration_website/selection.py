@@ -0,0 +1,206 @@
+import random
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .cache import TTLCache
+from .models import UserSeenQuestions
+from .questions import QuestionIndex
+
+# A question needs this many answers before its hit rate counts as difficulty
+MIN_ANSWERS_FOR_DIFFICULTY = 20
+
+
+def magnitude_group(answer: float) -> int:
+    """Group answers by thousands: units, thousands, millions, billions, ..."""
+    magnitude = np.floor(np.log10(max(abs(answer), 1.0)))
+    return int(magnitude // 3)
+
+
+def difficulty(hit_rate) -> str:
+    if hit_rate is None:
+        return "unknown"
+    if hit_rate >= 0.8:
+        return "easy"
+    if hit_rate < 0.5:
+        return "hard"
+    return "medium"
+
+
+def hit_rates_from_analytics(analytics: dict) -> dict:
+    """Per-question hit rates from a calibration analytics result."""
+    if not analytics:
+        return {}
+    return {
+        question["question_id"]: question["hit_rate"]
+        for question in analytics["per_question"]
+        if question["answers"] >= MIN_ANSWERS_FOR_DIFFICULTY
+    }
+
+
+class QuestionSelector:
+    """Draws quizzes that are balanced across strata of the question bank.
+
+    A stratum is a combination of answer magnitude group, category and
+    observed difficulty. Strata are computed once per question bank; a quiz
+    visits them round-robin in random order and takes a random question from
+    each, so drawing k questions costs O(k) however large the bank is.
+    """
+
+    def __init__(self, question_index: QuestionIndex, hit_rates: dict = None):
+        hit_rates = hit_rates or {}
+        strata = {}
+        for position, question_id in enumerate(question_index.ids):
+            key = (
+                magnitude_group(question_index.answers[position]),
+                question_index.categories[position],
+                difficulty(hit_rates.get(question_id)),
+            )
+            strata.setdefault(key, []).append(position)
+        self.question_index = question_index
+        self.strata = [np.array(positions) for positions in strata.values()]
+
+    def select(self, k: int, seen: int = 0) -> list[int]:
+        """Positions of ``k`` distinct questions, avoiding ``seen`` ids if possible.
+
+        ``seen`` is a bitset with bit n set for every question id n to skip.
+        Once every unseen question is used up, seen ones fill the rest.
+        """
+        k = min(k, len(self.question_index))
+        chosen = set()
+        for skip in (seen, 0) if seen else (0,):
+            open_strata = random.sample(range(len(self.strata)), len(self.strata))
+            while open_strata and len(chosen) < k:
+                for stratum in list(open_strata):
+                    position = self._draw(self.strata[stratum], chosen, skip)
+                    if position is None:
+                        open_strata.remove(stratum)
+                        continue
+                    chosen.add(position)
+                    if len(chosen) == k:
+                        break
+            if len(chosen) == k:
+                break
+        positions = list(chosen)
+        random.shuffle(positions)
+        return positions
+
+    def _usable(self, position: int, chosen: set, skip: int) -> bool:
+        question_id = self.question_index.ids[position]
+        return position not in chosen and not (skip >> question_id) & 1
+
+    def _draw(self, stratum, chosen: set, skip: int, tries: int = 8):
+        """A random usable member of the stratum, or None if there is none."""
+        for _ in range(tries):
+            position = int(stratum[random.randrange(len(stratum))])
+            if self._usable(position, chosen, skip):
+                return position
+        # Rejection sampling keeps missing, so look at the whole stratum once
+        candidates = [
+            int(position)
+            for position in stratum
+            if self._usable(int(position), chosen, skip)
+        ]
+        return random.choice(candidates) if candidates else None
+
+
+class SelectorCache:
+    """Reuses one QuestionSelector until the bank or the difficulty data changes."""
+
+    def __init__(self):
+        self._index = None
+        self._analytics = None
+        self._selector = None
+
+    def get(self, question_index: QuestionIndex, analytics: dict = None):
+        if (
+            self._selector is None
+            or self._index is not question_index
+            or self._analytics is not analytics
+        ):
+            self._selector = QuestionSelector(
+                question_index, hit_rates_from_analytics(analytics)
+            )
+            self._index = question_index
+            self._analytics = analytics
+        return self._selector
+
+
+question_selectors = SelectorCache()
+
+
+def bits_from_ids(question_ids) -> int:
+    bits = 0
+    for question_id in question_ids:
+        bits |= 1 << question_id
+    return bits
+
+
+class SeenQuestions:
+    """Per-user bitsets of the question ids a user has been asked.
+
+    Bitsets live in the user_seen_questions table and in an LRU cache in
+    front of it, so excluding seen questions never scans Score.details.
+    New bits reach the cache only once the caller's transaction commits, a
+    rollback leaves it untouched. Concurrent submissions of one user can race
+    and drop a few bits, which only means a question may come up again.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, db: AsyncSession, user_id: int) -> int:
+        bits = self._cache.get(user_id)
+        if bits is None:
+            blob = await db.scalar(
+                select(UserSeenQuestions.bits).where(
+                    UserSeenQuestions.user_id == user_id
+                )
+            )
+            bits = int.from_bytes(blob, "little") if blob else 0
+            self._cache.set(user_id, bits)
+        return bits
+
+    async def add(self, db: AsyncSession, user_id: int, question_ids):
+        """Mark questions as seen, inside the caller's transaction."""
+        pending = db.sync_session.info.setdefault(_PENDING_SEEN, {})
+        bits = pending.get((self, user_id))
+        if bits is None:
+            bits = await self.get(db, user_id)
+        bits |= bits_from_ids(question_ids)
+        pending[(self, user_id)] = bits
+        blob = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        stmt = insert(UserSeenQuestions).values(user_id=user_id, bits=blob)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserSeenQuestions.user_id],
+                set_={"bits": stmt.excluded.bits},
+            )
+        )
+
+    def forget(self, user_id: int):
+        self._cache.pop(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+
+# Session.info key for bits written in the current transaction, by
+# (SeenQuestions, user id); they are cached on commit and dropped otherwise
+_PENDING_SEEN = "pending_seen_questions"
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_bits(session):
+    for (seen, user_id), bits in session.info.pop(_PENDING_SEEN, {}).items():
+        seen._cache.set(user_id, bits)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted_bits(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_PENDING_SEEN, None)
+
+
+seen_questions = SeenQuestions()
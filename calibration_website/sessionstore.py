@@ -0,0 +1,176 @@
+import asyncio
+import datetime
+import logging
+import os
+import secrets
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from .cache import TTLCache
+from .models import WebSession
+
+# Where sessions live: "memory" (one process only) or "sqlite" (shared)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", "86400"))
+SESSION_MEMORY_SIZE = int(os.getenv("SESSION_MEMORY_SIZE", "100000"))
+# How often the sqlite backend deletes expired sessions
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", "600"))
+
+SESSION_COOKIE = "session_id"
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class MemorySessionBackend:
+    """Sessions in an in-process LRU; expired entries are dropped on access."""
+
+    def __init__(self, maxsize: int = 100000, ttl: float = 86400.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def load(self, session_id: str):
+        return self._cache.get(session_id)
+
+    async def save(self, session_id: str, data: dict, max_age: int):
+        self._cache.set(session_id, dict(data), ttl=max_age)
+
+    async def delete(self, session_id: str):
+        self._cache.pop(session_id)
+
+    async def sweep(self) -> int:
+        return 0
+
+
+class SQLiteSessionBackend:
+    """Sessions in the web_sessions table, shared by all worker processes."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    async def load(self, session_id: str):
+        async with self.session_factory() as db:
+            return await db.scalar(
+                select(WebSession.data).where(
+                    WebSession.id == session_id, WebSession.expires_at > _now()
+                )
+            )
+
+    async def save(self, session_id: str, data: dict, max_age: int):
+        expires_at = _now() + datetime.timedelta(seconds=max_age)
+        stmt = insert(WebSession).values(
+            id=session_id, data=data, expires_at=expires_at
+        )
+        async with self.session_factory() as db:
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[WebSession.id],
+                    set_={"data": stmt.excluded.data, "expires_at": expires_at},
+                )
+            )
+            await db.commit()
+
+    async def delete(self, session_id: str):
+        async with self.session_factory() as db:
+            await db.execute(delete(WebSession).where(WebSession.id == session_id))
+            await db.commit()
+
+    async def sweep(self) -> int:
+        """Delete expired sessions, returns how many were removed."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(WebSession).where(WebSession.expires_at <= _now())
+            )
+            await db.commit()
+            return result.rowcount
+
+
+def make_session_backend(kind: str, session_factory):
+    if kind == "memory":
+        return MemorySessionBackend(maxsize=SESSION_MEMORY_SIZE, ttl=SESSION_MAX_AGE)
+    if kind == "sqlite":
+        return SQLiteSessionBackend(session_factory)
+    raise ValueError(f"Unknown session backend: {kind}")
+
+
+async def sweep_sessions(backend, interval: float):
+    """Background task that removes expired sessions every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await backend.sweep()
+        except Exception:
+            logging.exception("Session sweep failed")
+            continue
+        if removed:
+            logging.info("Removed %d expired sessions", removed)
+
+
+class ServerSessionMiddleware:
+    """Keeps session data server-side, the cookie only holds an opaque id.
+
+    Provides ``request.session`` like Starlette's SessionMiddleware. Data is
+    only written back when the handler changed it. A session that starts
+    out empty always gets a fresh id, so an id planted before login is never
+    promoted. Requests under ``skip_prefixes`` (static files) get no session
+    and cost no lookup.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend,
+        max_age: int = 86400,
+        cookie_name: str = SESSION_COOKIE,
+        same_site: str = "lax",
+        https_only: bool = False,
+        skip_prefixes=("/static/",),
+    ):
+        self.app = app
+        self.backend = backend
+        self.max_age = max_age
+        self.cookie_name = cookie_name
+        self.skip_prefixes = tuple(skip_prefixes)
+        self.cookie_flags = f"path=/; HttpOnly; SameSite={same_site}"
+        if https_only:
+            self.cookie_flags += "; Secure"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or scope["path"].startswith(
+            self.skip_prefixes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.cookie_name)
+        stored = await self.backend.load(session_id) if session_id else None
+        scope["session"] = dict(stored) if stored else {}
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start":
+                cookie = await self._store(scope["session"], session_id, stored)
+                if cookie is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Set-Cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+    async def _store(self, session: dict, session_id, stored):
+        """Persist a changed session, returns the Set-Cookie value if any."""
+        if session == (stored or {}):
+            return None
+        if session:
+            if not stored:
+                session_id = secrets.token_urlsafe(32)
+            await self.backend.save(session_id, session, self.max_age)
+            return (
+                f"{self.cookie_name}={session_id}; Max-Age={self.max_age}; "
+                f"{self.cookie_flags}"
+            )
+        await self.backend.delete(session_id)
+        return (
+            f"{self.cookie_name}=null; Max-Age=0; "
+            f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.cookie_flags}"
+        )
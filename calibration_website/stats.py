@@ -0,0 +1,144 @@
+import datetime
+from sqlalchemy import case, func, or_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import UserStats
+
+
+def merge_stats_statement(
+    user_id: int,
+    attempt_count: int,
+    total_hits: int,
+    total_questions: int,
+    score_sum: float,
+    best_score: float,
+    last_score: float,
+    last_attempt_date: datetime.datetime,
+):
+    """Build an upsert that folds a batch of attempts into a user's totals.
+
+    A single attempt is a batch of one, so the same statement serves /submit
+    and the backfill script. The mean is combined as a weighted average and
+    the last score is taken from whichever side saw the later attempt.
+    """
+    stats = UserStats.__table__
+    stmt = insert(stats).values(
+        user_id=user_id,
+        attempt_count=attempt_count,
+        total_hits=total_hits,
+        total_questions=total_questions,
+        mean_score=score_sum / attempt_count,
+        best_score=best_score,
+        last_score=last_score,
+        last_attempt_date=last_attempt_date,
+    )
+    new = stmt.excluded
+    newer = or_(
+        stats.c.last_attempt_date.is_(None),
+        new.last_attempt_date >= stats.c.last_attempt_date,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[stats.c.user_id],
+        set_={
+            "attempt_count": stats.c.attempt_count + new.attempt_count,
+            "total_hits": stats.c.total_hits + new.total_hits,
+            "total_questions": stats.c.total_questions + new.total_questions,
+            "mean_score": (
+                stats.c.mean_score * stats.c.attempt_count
+                + new.mean_score * new.attempt_count
+            )
+            / (stats.c.attempt_count + new.attempt_count),
+            "best_score": func.max(
+                func.coalesce(stats.c.best_score, new.best_score), new.best_score
+            ),
+            "last_score": case((newer, new.last_score), else_=stats.c.last_score),
+            "last_attempt_date": case(
+                (newer, new.last_attempt_date), else_=stats.c.last_attempt_date
+            ),
+        },
+    )
+
+
+def aggregate_attempts(rows) -> dict:
+    """Sum up (user_id, score, date, details) rows per user.
+
+    The result maps each user id to keyword arguments for
+    merge_stats_statement.
+    """
+    totals = {}
+    for user_id, score, date, details in rows:
+        hits = sum(1 for result in details if result.get("correct"))
+        user = totals.get(user_id)
+        if user is None:
+            totals[user_id] = {
+                "attempt_count": 1,
+                "total_hits": hits,
+                "total_questions": len(details),
+                "score_sum": score,
+                "best_score": score,
+                "last_score": score,
+                "last_attempt_date": date,
+            }
+            continue
+        user["attempt_count"] += 1
+        user["total_hits"] += hits
+        user["total_questions"] += len(details)
+        user["score_sum"] += score
+        user["best_score"] = max(user["best_score"], score)
+        if date is not None and (
+            user["last_attempt_date"] is None or date >= user["last_attempt_date"]
+        ):
+            user["last_score"] = score
+            user["last_attempt_date"] = date
+    return totals
+
+
+async def record_attempt(
+    db: AsyncSession,
+    user_id: int,
+    score: float,
+    detailed_results: list,
+    date: datetime.datetime,
+):
+    """Add one attempt to the user's stats, inside the caller's transaction."""
+    hits = sum(1 for result in detailed_results if result["correct"])
+    await db.execute(
+        merge_stats_statement(
+            user_id,
+            attempt_count=1,
+            total_hits=hits,
+            total_questions=len(detailed_results),
+            score_sum=score,
+            best_score=score,
+            last_score=score,
+            last_attempt_date=date,
+        )
+    )
+
+
+async def get_user_stats(db: AsyncSession, user_id: int) -> dict:
+    """Read a user's stats row, or empty stats if they have no attempts yet."""
+    stats = await db.get(UserStats, user_id)
+    if stats is None:
+        return {
+            "attempt_count": 0,
+            "total_hits": 0,
+            "total_questions": 0,
+            "hit_rate": None,
+            "mean_score": None,
+            "best_score": None,
+            "last_score": None,
+            "last_attempt_date": None,
+        }
+    return {
+        "attempt_count": stats.attempt_count,
+        "total_hits": stats.total_hits,
+        "total_questions": stats.total_questions,
+        "hit_rate": stats.total_hits / stats.total_questions
+        if stats.total_questions
+        else None,
+        "mean_score": stats.mean_score,
+        "best_score": stats.best_score,
+        "last_score": stats.last_score,
+        "last_attempt_date": stats.last_attempt_date,
+    }
@@ -0,0 +1,296 @@
+import datetime
+import itertools
+import json
+import math
+import os
+import tempfile
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import Score
+from .questions import QuestionIndex
+from .responses import dumps
+from .scoring import score_attempt, score_intervals
+from .stats import aggregate_attempts, merge_stats_statement
+
+# Attempts scored and inserted together by /api/submit-batch
+SUBMIT_BATCH_CHUNK = int(os.getenv("SUBMIT_BATCH_CHUNK", "1000"))
+SUBMIT_BATCH_MAX_ATTEMPTS = int(os.getenv("SUBMIT_BATCH_MAX_ATTEMPTS", "100000"))
+# Longest NDJSON line accepted, one attempt is far below this
+SUBMIT_BATCH_MAX_LINE = 1024 * 1024
+# Scored rows wait in memory up to this size, then in a temporary file
+SUBMIT_BATCH_SPOOL_SIZE = 4 * 1024 * 1024
+
+METRIC_NAMES = ("coverage", "mean_log_width", "interval_score", "overconfidence")
+
+
+class BatchTooLarge(Exception):
+    pass
+
+
+def attempt_error(data, question_index: QuestionIndex):
+    """Why an attempt cannot be scored, or None if it is valid."""
+    if not data:
+        return "No data provided"
+    if not isinstance(data, dict) or "question_ids" not in data or "answers" not in data:
+        return "Questions or answers missing"
+    if not isinstance(data["question_ids"], list) or not isinstance(
+        data["answers"], dict
+    ):
+        return "Incorrect data types for questions or answers"
+    if not data["question_ids"]:
+        return "No questions provided"
+
+    for i, question_id in enumerate(data["question_ids"]):
+        # bool is a subclass of int, True would pass as question 1
+        if (
+            not isinstance(question_id, int)
+            or isinstance(question_id, bool)
+            or question_id not in question_index
+        ):
+            return f"Unknown question id {question_id}"
+        if f"lower_{i}" not in data["answers"] or f"upper_{i}" not in data["answers"]:
+            return f"Bounds for question {i} not provided"
+        try:
+            lower = float(data["answers"][f"lower_{i}"])
+            upper = float(data["answers"][f"upper_{i}"])
+        except (TypeError, ValueError):
+            return f"Non-numeric bounds provided for question {i}"
+        # NaN and Infinity would be stored in details and break their JSON
+        if not math.isfinite(lower) or not math.isfinite(upper):
+            return f"Non-finite bounds provided for question {i}"
+    # Repeating a known question would inflate coverage
+    if len(set(data["question_ids"])) != len(data["question_ids"]):
+        return "Duplicate question ids"
+    return None
+
+
+def score_attempts(attempts, question_index: QuestionIndex) -> list:
+    """Score validated (question_ids, answers) pairs, one numpy pass per quiz length.
+
+    Returns (score, detailed_results, metrics) per attempt, in input order.
+    """
+    results = [None] * len(attempts)
+    by_length = {}
+    for i, (question_ids, _) in enumerate(attempts):
+        by_length.setdefault(len(question_ids), []).append(i)
+
+    for n, members in by_length.items():
+        positions = np.array(
+            [question_index.positions(attempts[i][0]) for i in members]
+        ).reshape(len(members), n)
+        bounds = np.array(
+            [
+                [float(attempts[i][1][f"{side}_{j}"]) for j in range(n)]
+                for i in members
+                for side in ("lower", "upper")
+            ]
+        ).reshape(len(members), 2, n)
+        lower, upper = bounds[:, 0], bounds[:, 1]
+        truth = question_index.answers[positions]
+        metrics = score_intervals(lower, upper, truth)
+
+        summaries = np.stack([metrics[name] for name in METRIC_NAMES], axis=1)
+        for row, i in enumerate(members):
+            summary = dict(zip(METRIC_NAMES, summaries[row].tolist()))
+            detailed_results = [
+                {
+                    "question_id": question_id,
+                    "question": question_index.texts[position],
+                    "correct": correct,
+                    "correct_answer": answer,
+                    "lower_bound": low,
+                    "upper_bound": high,
+                }
+                for question_id, position, correct, answer, low, high in zip(
+                    attempts[i][0],
+                    positions[row].tolist(),
+                    metrics["hits"][row].tolist(),
+                    truth[row].tolist(),
+                    lower[row].tolist(),
+                    upper[row].tolist(),
+                )
+            ]
+            results[i] = (
+                round(summary["coverage"] * 100),
+                detailed_results,
+                summary,
+            )
+    return results
+
+
+def calculate_score(question_ids, answers, question_index: QuestionIndex):
+    """Score a single validated attempt, like score_attempts does for many."""
+    positions = question_index.positions(question_ids)
+    lower = [float(answers[f"lower_{i}"]) for i in range(len(question_ids))]
+    upper = [float(answers[f"upper_{i}"]) for i in range(len(question_ids))]
+    truth = question_index.answers[positions].tolist()
+    metrics = score_attempt(lower, upper, truth)
+
+    summary = {name: metrics[name] for name in METRIC_NAMES}
+    detailed_results = [
+        {
+            "question_id": question_id,
+            "question": question_index.texts[position],
+            "correct": correct,
+            "correct_answer": answer,
+            "lower_bound": low,
+            "upper_bound": high,
+        }
+        for question_id, position, correct, answer, low, high in zip(
+            question_ids, positions, metrics["hits"], truth, lower, upper
+        )
+    ]
+    return round(summary["coverage"] * 100), detailed_results, summary
+
+
+async def iter_ndjson(chunks, max_line: int = SUBMIT_BATCH_MAX_LINE):
+    """Parse an NDJSON byte stream line by line.
+
+    Yields the parsed object, or the ValueError for a line that is not JSON.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > max_line:
+            raise ValueError("NDJSON line too long")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def iter_list(items):
+    for item in items:
+        yield item
+
+
+def _attempt_date(data):
+    """UTC date of an attempt taken offline, now if it has none."""
+    date = data.get("date")
+    if date is None:
+        return datetime.datetime.now(datetime.timezone.utc)
+    date = datetime.datetime.fromisoformat(date)
+    if date.tzinfo is None:
+        return date.replace(tzinfo=datetime.timezone.utc)
+    # SQLite stores the wall time and drops the offset, so store it as UTC
+    return date.astimezone(datetime.timezone.utc)
+
+
+async def submit_batch(
+    db: AsyncSession,
+    user_id: int,
+    attempts,
+    question_index: QuestionIndex,
+    out,
+    seen_questions=None,
+    chunk_size: int = SUBMIT_BATCH_CHUNK,
+    max_attempts: int = SUBMIT_BATCH_MAX_ATTEMPTS,
+):
+    """Validate, score and store a stream of attempts in one transaction.
+
+    ``attempts`` is an async iterator of attempt dicts. Attempts are scored
+    ``chunk_size`` at a time and the rows spooled to a temporary file, so
+    memory depends on the chunk size and not on the upload. Only once the
+    whole upload is read are the rows inserted, in one short transaction:
+    a slow client never holds the SQLite write lock. Per-attempt results are
+    written to ``out`` as comma-separated JSON objects. Invalid attempts get
+    an error result and are skipped. Returns (accepted, rejected).
+    """
+    accepted = rejected = 0
+    seen_ids = set()
+    chunk = []
+    index = 0
+    # The auth lookup may have opened a read transaction, don't keep it
+    # open while the upload is read
+    await db.commit()
+
+    with tempfile.SpooledTemporaryFile(max_size=SUBMIT_BATCH_SPOOL_SIZE) as rows:
+
+        def score_chunk(chunk):
+            scored = score_attempts(
+                [(data["question_ids"], data["answers"]) for _, data, _ in chunk],
+                question_index,
+            )
+            for (i, data, date), (score, detailed_results, summary) in zip(
+                chunk, scored
+            ):
+                rows.write(dumps([score, detailed_results, date.isoformat()]))
+                rows.write(b"\n")
+                seen_ids.update(data["question_ids"])
+                write_result(out, {"index": i, "score": score, **summary})
+            return len(chunk)
+
+        async for data in attempts:
+            if index >= max_attempts:
+                raise BatchTooLarge(f"More than {max_attempts} attempts")
+            error = (
+                f"Invalid JSON: {data}"
+                if isinstance(data, ValueError)
+                else attempt_error(data, question_index)
+            )
+            date = None
+            if error is None:
+                try:
+                    date = _attempt_date(data)
+                except (TypeError, ValueError):
+                    error = "Invalid date"
+            if error is not None:
+                rejected += 1
+                write_result(out, {"index": index, "error": error})
+            else:
+                chunk.append((index, data, date))
+            index += 1
+            if len(chunk) >= chunk_size:
+                accepted += score_chunk(chunk)
+                chunk = []
+        if chunk:
+            accepted += score_chunk(chunk)
+
+        rows.seek(0)
+        try:
+            while batch := list(itertools.islice(rows, chunk_size)):
+                await _insert_rows(db, user_id, batch)
+            if seen_questions is not None and seen_ids:
+                await seen_questions.add(db, user_id, seen_ids)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+    return accepted, rejected
+
+
+async def _insert_rows(db: AsyncSession, user_id: int, lines):
+    """Insert spooled score rows and fold them into user_stats."""
+    rows = []
+    for line in lines:
+        score, details, date = json.loads(line)
+        rows.append(
+            {
+                "user_id": user_id,
+                "score": score,
+                "details": details,
+                "date": datetime.datetime.fromisoformat(date),
+            }
+        )
+    await db.execute(insert(Score), rows)
+    totals = aggregate_attempts(
+        (row["user_id"], row["score"], row["date"], row["details"]) for row in rows
+    )
+    for user, user_totals in totals.items():
+        await db.execute(merge_stats_statement(user, **user_totals))
+
+
+def write_result(out, result: dict):
+    if out.tell():
+        out.write(b",")
+    out.write(dumps(result))
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from .models import Score
+from .stats import aggregate_attempts, merge_stats_statement
+
+# Write-behind settings for score inserts, off unless SCORE_WRITE_BEHIND is set
+SCORE_WRITE_BEHIND = os.getenv("SCORE_WRITE_BEHIND", "False").lower() in ["true", "1"]
+SCORE_BATCH_SIZE = int(os.getenv("SCORE_BATCH_SIZE", "200"))
+SCORE_FLUSH_MS = float(os.getenv("SCORE_FLUSH_MS", "20"))
+SCORE_QUEUE_SIZE = int(os.getenv("SCORE_QUEUE_SIZE", "10000"))
+# "commit": /submit returns once its batch is committed (group commit)
+# "enqueue": /submit returns as soon as the score is queued
+SCORE_WRITE_DURABILITY = os.getenv("SCORE_WRITE_DURABILITY", "commit")
+
+
+class ScoreWriter:
+    """Collects submitted scores on a queue and writes them in batches.
+
+    A background task takes up to ``batch_size`` scores, or whatever arrived
+    within ``flush_interval`` seconds of the first one, and inserts them with
+    one bulk insert and one commit, together with the matching user_stats
+    updates. With ``wait_for_commit`` each caller still waits for its batch to
+    be committed, so only the fsyncs are shared; without it callers return as
+    soon as the score is queued and a crash can lose the last batch.
+
+    A locked database is retried with exponential backoff. If a batch still
+    fails, its rows are written one at a time so a bad row cannot take the
+    rest of the batch down with it.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int = 200,
+        flush_interval: float = 0.02,
+        wait_for_commit: bool = True,
+        max_queue: int = 10000,
+        seen_questions=None,
+        max_retries: int = 3,
+        retry_delay: float = 0.05,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.wait_for_commit = wait_for_commit
+        self.max_queue = max_queue
+        self.seen_questions = seen_questions
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue = None
+        self._task = None
+        self._batches = 0
+        self._rows = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything that is still queued, then stop the task."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, user_id: int, score: float, details: list, date):
+        future = None
+        if self.wait_for_commit:
+            future = asyncio.get_running_loop().create_future()
+        row = {"user_id": user_id, "score": score, "details": details, "date": date}
+        await self._queue.put((row, future))
+        if future is not None:
+            await future
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "rows": self._rows,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        rows = [row for row, _ in batch]
+        try:
+            await self._write_with_retry(rows)
+        except Exception:
+            logging.exception("Error writing batch of %d scores", len(rows))
+        else:
+            self._done(batch)
+            return
+
+        # Write row by row, so one bad row only fails its own submission
+        for item in batch:
+            try:
+                await self._write_with_retry([item[0]])
+            except Exception as e:
+                logging.exception("Error writing score of user %s", item[0]["user_id"])
+                future = item[1]
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            else:
+                self._done([item])
+
+    def _done(self, batch):
+        self._batches += 1
+        self._rows += len(batch)
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    async def _write_with_retry(self, rows):
+        """Write rows, retrying with backoff while the database is locked."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._write(rows)
+                return
+            except OperationalError as e:
+                if attempt == self.max_retries or not _is_transient(e):
+                    raise
+                delay = self.retry_delay * 2**attempt
+                logging.warning(
+                    "Database busy writing %d scores, retrying in %.2fs",
+                    len(rows),
+                    delay,
+                )
+                await asyncio.sleep(delay)
+
+    async def _write(self, rows):
+        async with self.session_factory() as session:
+            await session.execute(insert(Score), rows)
+            totals = aggregate_attempts(
+                (row["user_id"], row["score"], row["date"], row["details"])
+                for row in rows
+            )
+            for user_id, user_totals in totals.items():
+                await session.execute(merge_stats_statement(user_id, **user_totals))
+            if self.seen_questions is not None:
+                for user_id, question_ids in _asked_questions(rows).items():
+                    await self.seen_questions.add(session, user_id, question_ids)
+            await session.commit()
+
+
+def _is_transient(error: OperationalError) -> bool:
+    """Lock contention that goes away by itself, as opposed to a broken query."""
+    message = str(error.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+def _asked_questions(rows) -> dict:
+    """Question ids per user across a batch of score rows."""
+    asked = {}
+    for row in rows:
+        asked.setdefault(row["user_id"], []).extend(
+            result["question_id"]
+            for result in row["details"]
+            if "question_id" in result
+        )
+    return asked
@@ -54,6 +54,8 @@ def deploy(c):
 # Environment variables for the Calibration Website
 SECRET_KEY={secret_key}
 DATABASE_URL=sqlite+aiosqlite:///./app.db  # Adjust this if using a different database
+SQLITE_TUNING=production  # WAL, synchronous=NORMAL, busy timeout; "none" to disable
+SESSION_BACKEND=sqlite  # Sessions shared by all worker processes
 DEBUG=False  # Set to False in production
             """
             conn.run(f"echo '{env_content}' > {ENV_FILE}")
@@ -66,6 +68,11 @@ DEBUG=False  # Set to False in production
         conn.run(f"{TARGET_DIR}/venv/bin/pip install --upgrade .")
         print("Dependencies installed.")
 
+        # Fingerprint and precompress static assets
+        print("Building static assets...")
+        conn.run(f"{TARGET_DIR}/venv/bin/python scripts/build_static.py")
+        print("Static assets built.")
+
         # Initialize the database
         print("Initializing the database...")
         conn.run(f"{TARGET_DIR}/venv/bin/python scripts/init_db.py")
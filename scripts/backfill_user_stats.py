@@ -0,0 +1,59 @@
+# scripts/backfill_user_stats.py
+"""Rebuild the user_stats table from the scores table.
+
+Scores are read in chunks ordered by id, aggregated per user and merged into
+user_stats with the same upsert /submit uses, so memory stays bounded by the
+chunk size. Run it while /submit is not taking writes, since the table is
+cleared first.
+"""
+
+import argparse
+import asyncio
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from calibration_website.models import Score, UserStats
+from calibration_website.stats import aggregate_attempts, merge_stats_statement
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./production.db")
+
+
+async def backfill(chunk_size: int):
+    engine = create_async_engine(DATABASE_URL)
+    async with AsyncSession(engine) as session:
+        await session.execute(delete(UserStats))
+        await session.commit()
+
+        last_id = 0
+        processed = 0
+        while True:
+            result = await session.execute(
+                select(Score.id, Score.user_id, Score.score, Score.date, Score.details)
+                .where(Score.id > last_id)
+                .order_by(Score.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            totals = aggregate_attempts(row[1:] for row in rows)
+            for user_id, user in totals.items():
+                await session.execute(merge_stats_statement(user_id, **user))
+            await session.commit()
+
+            processed += len(rows)
+            print(f"Processed {processed} scores (up to id {last_id})")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.chunk_size))
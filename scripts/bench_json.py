@@ -0,0 +1,64 @@
+# scripts/bench_json.py
+"""Compare the serialization cost of API responses before and after responses.py.
+
+Before, a score history page went through ScoreOut/ScorePage validation and
+the stdlib JSONResponse; now rows are rendered to bytes directly. The /submit
+body is compared with JSONResponse against FastJSONResponse.
+"""
+
+import argparse
+import datetime
+import json
+import timeit
+from fastapi.responses import JSONResponse
+from calibration_website.responses import FastJSONResponse, render_score_page
+from calibration_website.schemas import ScorePage
+
+
+def make_rows(count: int, questions: int):
+    details = [
+        {
+            "question_id": i,
+            "question": f"Question {i}",
+            "correct": i % 2 == 0,
+            "correct_answer": 1234.5 * i,
+            "lower_bound": 1000.0 * i,
+            "upper_bound": 2000.0 * i,
+        }
+        for i in range(questions)
+    ]
+    date = datetime.datetime(2024, 1, 1)
+    objects = [
+        {"id": i, "score": 50.0, "date": date, "details": details} for i in range(count)
+    ]
+    raw_details = json.dumps(details)
+    rows = [(i, 50.0, date, raw_details) for i in range(count)]
+    return objects, rows, details
+
+
+def old_score_page(objects):
+    page = ScorePage(items=objects, next_cursor="cursor")
+    return JSONResponse(content=page.model_dump(mode="json")).body
+
+
+def main(page_size: int, questions: int, repeat: int):
+    objects, rows, details = make_rows(page_size, questions)
+    before = timeit.timeit(lambda: old_score_page(objects), number=repeat)
+    after = timeit.timeit(lambda: render_score_page(rows, "cursor"), number=repeat)
+    print(f"score history page of {page_size}, before: {before / repeat * 1e6:8.1f} us")
+    print(f"score history page of {page_size}, after:  {after / repeat * 1e6:8.1f} us")
+
+    submit = {"score": 50.0, "detailed_results": details, "metrics": {"hits": 5}}
+    before = timeit.timeit(lambda: JSONResponse(content=submit), number=repeat)
+    after = timeit.timeit(lambda: FastJSONResponse(content=submit), number=repeat)
+    print(f"submit response, before: {before / repeat * 1e6:8.1f} us")
+    print(f"submit response, after:  {after / repeat * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.page_size, args.questions, args.repeat)
@@ -0,0 +1,82 @@
+# scripts/bench_scoring.py
+"""Compare the vectorized scoring engine with the per-question Python loop.
+
+The loop is the scoring code /submit used before scoring.py, kept here as the
+baseline. It only computes the hit rate, the engine computes all metrics.
+score_attempt is the plain Python path /submit uses for a single attempt.
+"""
+
+import argparse
+import timeit
+import numpy as np
+from calibration_website.scoring import score_attempt, score_intervals
+
+
+def loop_score(selected_questions, answers):
+    correct_count = 0
+    detailed_results = []
+    for i, question_answer_d in enumerate(selected_questions):
+        lower = float(answers.get(f"lower_{i}"))
+        upper = float(answers.get(f"upper_{i}"))
+        correct = lower <= question_answer_d["answer"] <= upper
+        detailed_results.append(
+            {
+                "question": question_answer_d["question"],
+                "correct": correct,
+                "correct_answer": question_answer_d["answer"],
+                "lower_bound": lower,
+                "upper_bound": upper,
+            }
+        )
+        if correct:
+            correct_count += 1
+    score = round((correct_count / len(selected_questions)) * 100)
+    return score, detailed_results
+
+
+def make_attempts(attempts: int, questions: int):
+    rng = np.random.default_rng(0)
+    truth = rng.uniform(1, 1e9, size=(attempts, questions))
+    lower = truth * rng.uniform(0.3, 1.2, size=truth.shape)
+    upper = lower * rng.uniform(1.0, 3.0, size=truth.shape)
+    return lower, upper, truth
+
+
+def main(attempts: int, questions: int, repeat: int):
+    lower, upper, truth = make_attempts(attempts, questions)
+    loop_inputs = [
+        (
+            [{"question": "q", "answer": a} for a in truth[i].tolist()],
+            {
+                **{f"lower_{j}": v for j, v in enumerate(lower[i].tolist())},
+                **{f"upper_{j}": v for j, v in enumerate(upper[i].tolist())},
+            },
+        )
+        for i in range(attempts)
+    ]
+
+    single_loop = timeit.timeit(lambda: loop_score(*loop_inputs[0]), number=repeat)
+    single_engine = timeit.timeit(
+        lambda: score_intervals(lower[0], upper[0], truth[0]), number=repeat
+    )
+    single_lists = lower[0].tolist(), upper[0].tolist(), truth[0].tolist()
+    single_fast = timeit.timeit(lambda: score_attempt(*single_lists), number=repeat)
+    print(f"single attempt, loop:   {single_loop / repeat * 1e6:8.1f} us")
+    print(f"single attempt, engine: {single_engine / repeat * 1e6:8.1f} us")
+    print(f"single attempt, fast:   {single_fast / repeat * 1e6:8.1f} us")
+
+    batch_loop = timeit.timeit(
+        lambda: [loop_score(*inputs) for inputs in loop_inputs], number=1
+    )
+    batch_engine = timeit.timeit(lambda: score_intervals(lower, upper, truth), number=1)
+    print(f"{attempts} attempts, loop:   {batch_loop * 1e3:8.1f} ms")
+    print(f"{attempts} attempts, engine: {batch_engine * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=100000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.attempts, args.questions, args.repeat)
@@ -0,0 +1,64 @@
+# scripts/bench_sqlite_commits.py
+"""Measure /submit-style commit throughput for each SQLite tuning profile.
+
+Every worker inserts one score per transaction, like an authenticated
+/submit does, against a fresh database file per profile.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from calibration_website.database import SQLITE_PROFILES, apply_sqlite_tuning
+from calibration_website.models import Base, Score, User
+
+DETAILS = [
+    {
+        "question": "How many smartphones were sold globally in 2022?",
+        "correct": True,
+        "correct_answer": 1450000000,
+        "lower_bound": 1e9,
+        "upper_bound": 2e9,
+    }
+] * 10
+
+
+async def run_profile(profile: str, workers: int, commits: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_async_engine(url, pool_size=workers, max_overflow=0)
+        apply_sqlite_tuning(engine, profile)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User).values(id=1, username="bench"))
+
+        async def worker():
+            for _ in range(commits):
+                async with AsyncSession(engine) as session:
+                    await session.execute(
+                        insert(Score).values(user_id=1, score=50.0, details=DETAILS)
+                    )
+                    await session.commit()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        elapsed = time.perf_counter() - start
+        await engine.dispose()
+    return workers * commits / elapsed
+
+
+async def main(workers: int, commits: int):
+    for profile in SQLITE_PROFILES:
+        throughput = await run_profile(profile, workers, commits)
+        print(f"{profile:>12}: {throughput:8.1f} commits/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.commits))
@@ -0,0 +1,18 @@
+# scripts/build_static.py
+"""Fingerprint and precompress everything under static/ for production.
+
+Writes static/dist/ with content-hashed copies, .gz (and .br when brotli is
+installed) siblings and a manifest.json the app uses to resolve asset URLs.
+Run it again after changing any static file.
+"""
+
+import argparse
+from calibration_website.assets import build_assets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--static-dir", default="static")
+    args = parser.parse_args()
+    manifest = build_assets(args.static_dir)
+    print(f"Built {len(manifest)} assets into {args.static_dir}/dist")
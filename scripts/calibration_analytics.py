@@ -0,0 +1,37 @@
+# scripts/calibration_analytics.py
+"""Print population-level calibration analytics as JSON.
+
+Streams all stored attempts in chunks, so it runs in constant memory however
+many scores the database holds.
+"""
+
+import argparse
+import asyncio
+import json
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from calibration_website.analytics import ANALYTICS_CHUNK_SIZE, compute_calibration
+from calibration_website.questions import QuestionIndex
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./production.db")
+
+
+async def main(questions_path: str, chunk_size: int):
+    question_index = QuestionIndex.from_file(questions_path)
+    engine = create_async_engine(DATABASE_URL)
+    async with AsyncSession(engine) as session:
+        result = await compute_calibration(session, question_index, chunk_size)
+    await engine.dispose()
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", default="questions.json")
+    parser.add_argument("--chunk-size", type=int, default=ANALYTICS_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions, args.chunk_size))
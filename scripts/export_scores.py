@@ -0,0 +1,43 @@
+# scripts/export_scores.py
+"""Export all stored attempts as NDJSON or CSV for research use.
+
+Rows are streamed from a database cursor straight to the output file, so the
+export runs in constant memory.
+"""
+
+import argparse
+import asyncio
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from calibration_website.export import EXPORT_FORMATS, export_scores
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./production.db")
+
+
+async def main(fmt: str, output: str, gzip: bool, user_id: int):
+    engine = create_async_engine(DATABASE_URL)
+    session_factory = sessionmaker(engine, class_=AsyncSession)
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        async for chunk in export_scores(session_factory, fmt, user_id, gzip):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--output", default="-", help="File to write, - for stdout")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.format, args.output, args.gzip, args.user_id))
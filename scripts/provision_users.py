@@ -0,0 +1,184 @@
+# scripts/provision_users.py
+"""Create many user accounts at once from a CSV or JSON file.
+
+Each user needs username, email and password; first_name, last_name and
+date_of_birth (YYYY-MM-DD) are optional. CSV files need a header row, JSON
+files hold a list of objects. Users whose username or email already exists,
+in the database or earlier in the file, are skipped and reported. Passwords
+are hashed across a process pool and all accounts are inserted in one
+transaction, so either every new account is created or none is.
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import insert, or_, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from calibration_website.auth import get_password_hash
+from calibration_website.models import User
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./production.db")
+
+REQUIRED_FIELDS = ("username", "email", "password")
+# Users per conflict lookup query, keeps it below SQLite's 999 variables
+MAX_LOOKUP_USERS = 400
+
+
+def read_users(path: str) -> list[dict]:
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            try:
+                users = json.load(f)
+            except ValueError as e:
+                sys.exit(f"{path} is not valid JSON: {e}")
+        if not isinstance(users, list) or not all(
+            isinstance(user, dict) for user in users
+        ):
+            sys.exit(f"{path} must hold a JSON list of user objects")
+        return users
+    with open(path, "r", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def check_users(users: list[dict]):
+    """Split users into valid ones and (row, username, reason) rejections."""
+    valid, rejected = [], []
+    usernames, emails = set(), set()
+    for line, user in enumerate(users, start=1):
+        missing = [field for field in REQUIRED_FIELDS if not user.get(field)]
+        if missing:
+            reason = f"missing {', '.join(missing)}"
+            rejected.append((line, user.get("username"), reason))
+            continue
+        if user["username"] in usernames or user["email"] in emails:
+            rejected.append((line, user["username"], "duplicate in file"))
+            continue
+        try:
+            date_of_birth = user.get("date_of_birth") or None
+            if date_of_birth:
+                date_of_birth = datetime.datetime.fromisoformat(date_of_birth)
+        except (TypeError, ValueError):
+            rejected.append((line, user["username"], "invalid date_of_birth"))
+            continue
+        usernames.add(user["username"])
+        emails.add(user["email"])
+        valid.append(
+            {
+                "line": line,
+                "username": user["username"],
+                "email": user["email"],
+                "password": user["password"],
+                "first_name": user.get("first_name") or None,
+                "last_name": user.get("last_name") or None,
+                "date_of_birth": date_of_birth,
+            }
+        )
+    return valid, rejected
+
+
+async def existing_accounts(session: AsyncSession, users: list[dict], chunk_size: int):
+    """Usernames and emails of the given users that are already taken.
+
+    Looked up ``chunk_size`` users per query, each binds two parameters per
+    user and older SQLite builds allow only 999.
+    """
+    chunk_size = min(chunk_size, MAX_LOOKUP_USERS)
+    taken_usernames, taken_emails = set(), set()
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start : start + chunk_size]
+        result = await session.execute(
+            select(User.username, User.email).where(
+                or_(
+                    User.username.in_([user["username"] for user in chunk]),
+                    User.email.in_([user["email"] for user in chunk]),
+                )
+            )
+        )
+        for username, email in result:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+    return taken_usernames, taken_emails
+
+
+def hash_passwords(passwords: list[str], workers: int) -> list[str]:
+    hashes = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for hashed in executor.map(get_password_hash, passwords, chunksize=4):
+            hashes.append(hashed)
+            print(
+                f"\rHashing passwords: {len(hashes)}/{len(passwords)}",
+                end="",
+                file=sys.stderr,
+            )
+    print(file=sys.stderr)
+    return hashes
+
+
+async def provision(path: str, batch_size: int, workers: int, dry_run: bool):
+    valid, rejected = check_users(read_users(path))
+
+    engine = create_async_engine(DATABASE_URL)
+    async with AsyncSession(engine) as session:
+        # One query per batch for conflicts instead of a lookup per user
+        taken_usernames, taken_emails = await existing_accounts(
+            session, valid, batch_size
+        )
+        new_users = []
+        for user in valid:
+            if user["username"] in taken_usernames:
+                rejected.append((user["line"], user["username"], "username taken"))
+            elif user["email"] in taken_emails:
+                rejected.append((user["line"], user["username"], "email taken"))
+            else:
+                new_users.append(user)
+
+        for line, username, reason in sorted(rejected):
+            print(f"Skipping row {line} ({username}): {reason}")
+
+        if dry_run:
+            print(f"Dry run: would create {len(new_users)} users, skip {len(rejected)}")
+        elif new_users:
+            hashes = hash_passwords([user["password"] for user in new_users], workers)
+            rows = [
+                {
+                    "username": user["username"],
+                    "email": user["email"],
+                    "hashed_password": hashed,
+                    "first_name": user["first_name"],
+                    "last_name": user["last_name"],
+                    "date_of_birth": user["date_of_birth"],
+                }
+                for user, hashed in zip(new_users, hashes)
+            ]
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start : start + batch_size]
+                await session.execute(insert(User), batch)
+                done = start + len(batch)
+                print(f"\rInserting users: {done}/{len(rows)}", end="", file=sys.stderr)
+            print(file=sys.stderr)
+            await session.commit()
+            print(f"Created {len(rows)} users, skipped {len(rejected)}")
+        else:
+            print(f"Nothing to create, skipped {len(rejected)}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV or JSON file with the users")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what would be created"
+    )
+    args = parser.parse_args()
+    asyncio.run(provision(args.path, args.batch_size, args.workers, args.dry_run))
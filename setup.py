@@ -13,6 +13,7 @@ setup(
         "aiofiles",
         "jinja2",
         "httpx",
+        "numpy",
     ],
     extras_require={
         "dev": [
@@ -20,6 +21,7 @@ setup(
             "pytest-asyncio",
             "pytest-cov",  # Optional: for coverage reports
         ],
+        "brotli": ["brotli"],  # Optional: .br files from scripts/build_static.py
     },
     entry_points={
         "console_scripts": [
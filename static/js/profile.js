@@ -1,4 +1,53 @@
+function formatScoreDate(isoDate) {
+    // Match the server-rendered format: YYYY-MM-DD HH:MM:SS
+    return isoDate.replace('T', ' ').slice(0, 19);
+}
+
+async function loadMoreScores(button) {
+    const params = new URLSearchParams({
+        cursor: button.dataset.cursor,
+        limit: button.dataset.pageSize,
+    });
+    button.disabled = true;
+
+    try {
+        const response = await fetch(`/api/score-history?${params}`);
+        if (!response.ok) {
+            const error = await response.json();
+            alert(`Error: ${error.detail}`);
+            button.disabled = false;
+            return;
+        }
+
+        const page = await response.json();
+        const list = document.getElementById('score-history-list');
+        page.items.forEach(score => {
+            const item = document.createElement('li');
+            item.className = 'list-group-item';
+            item.innerHTML = `<strong>Date:</strong> ${formatScoreDate(score.date)} | ` +
+                `<strong>Score:</strong> ${score.score}%`;
+            list.appendChild(item);
+        });
+
+        if (page.next_cursor) {
+            button.dataset.cursor = page.next_cursor;
+            button.disabled = false;
+        } else {
+            button.remove();
+        }
+    } catch (error) {
+        console.error('Error during fetch:', error);
+        button.disabled = false;
+    }
+}
+
 document.addEventListener('DOMContentLoaded', () => {
+    // Fetch further pages of the score history on demand
+    document.getElementById('load-more-scores')?.addEventListener('click', function (event) {
+        event.preventDefault();
+        loadMoreScores(this);
+    });
+
     // Add event listener for deleting profile
     document.getElementById('delete-profile')?.addEventListener('click', async function (event) {
         event.preventDefault();
@@ -3,7 +3,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let selectedQuestions = [];
 
-    fetch('/questions')
+    fetch('/questions?exclude_seen=true')
         .then(response => {
             if (!response.ok) {
                 throw new Error(`Network response was not ok: ${response.statusText}`);
@@ -120,7 +120,7 @@ document.addEventListener('DOMContentLoaded', () => {
             console.log('Submitting answers:', answers); // Debugging statement
             fetch('/submit', {
                 method: 'POST',
-                body: JSON.stringify({ questions: selectedQuestions, answers: answers }),
+                body: JSON.stringify({ question_ids: selectedQuestions.map(q => q.id), answers: answers }),
                 headers: {
                     'Content-Type': 'application/json'
                 }
@@ -1,8 +1,27 @@
+import os
+
+# Bearer tokens are only issued and accepted with a configured key
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
 import pytest
-from sqlalchemy import text
+from contextlib import contextmanager
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from calibration_website.database import Base
+from httpx import AsyncClient
+from calibration_website.auth import get_password_hash, identity_cache, token_cache
+from calibration_website.database import Base, get_session, get_session_factory
+from calibration_website.main import app
+from calibration_website.models import User
+from calibration_website.selection import seen_questions
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Every test database reuses user ids, so per-user caches must start empty."""
+    identity_cache.clear()
+    token_cache.clear()
+    seen_questions.clear()
 
 
 @pytest.fixture(scope="function")
@@ -26,3 +45,56 @@ async def db_session():
     finally:
         await session.close()
         await engine.dispose()
+
+
+@pytest.fixture
+async def client(db_session):
+    app.dependency_overrides[get_session] = lambda: db_session
+    app.dependency_overrides[get_session_factory] = lambda: sessionmaker(
+        db_session.bind, class_=AsyncSession, expire_on_commit=False
+    )
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def user(db_session):
+    user = User(
+        username="scoreuser",
+        email="scoreuser@example.com",
+        hashed_password=get_password_hash("password123"),
+    )
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+@pytest.fixture
+async def logged_in_client(client, user):
+    response = await client.post(
+        "/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert response.status_code == 303, response.text
+    return client
+
+
+@pytest.fixture
+def count_statements(db_session):
+    """Context manager collecting every SQL statement sent inside its block."""
+
+    @contextmanager
+    def count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sync_engine = db_session.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return count
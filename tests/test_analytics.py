@@ -0,0 +1,97 @@
+import datetime
+import pytest
+from calibration_website.analytics import calibration_cache, compute_calibration
+from calibration_website.main import question_bank
+from calibration_website.models import Score
+
+question_index = question_bank.index
+
+
+def details(hits):
+    """Results for the first two questions of the bank."""
+    return [
+        {
+            "question_id": question_index.ids[i],
+            "question": question_index.texts[i],
+            "correct": hit,
+            "correct_answer": float(question_index.answers[i]),
+        }
+        for i, hit in enumerate(hits)
+    ]
+
+
+@pytest.fixture(autouse=True)
+async def scores(db_session, user):
+    calibration_cache.clear()
+    db_session.add_all(
+        [
+            Score(
+                user_id=user.id,
+                score=100,
+                date=datetime.datetime(2024, 1, 5),
+                details=details([True, True]),
+            ),
+            Score(
+                user_id=user.id,
+                score=50,
+                date=datetime.datetime(2024, 2, 5),
+                details=details([False, True]),
+            ),
+        ]
+    )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_calibration_aggregates_in_chunks(db_session):
+    result = await compute_calibration(db_session, question_index, chunk_size=1)
+
+    assert result["attempts"] == 2
+    assert result["answers"] == 4
+    assert result["hit_rate"] == 0.75
+    first, second = result["per_question"][:2]
+    assert (first["answers"], first["hit_rate"]) == (2, 0.5)
+    assert (second["answers"], second["hit_rate"]) == (2, 1.0)
+    assert [month["month"] for month in result["per_month"]] == ["2024-01", "2024-02"]
+    assert sum(bucket["answers"] for bucket in result["per_magnitude"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_calibration_endpoint_refreshes_in_the_background(
+    logged_in_client, db_session, user, monkeypatch
+):
+    monkeypatch.setattr(calibration_cache, "min_interval", 0)
+    first = (await logged_in_client.get("/api/analytics/calibration")).json()
+    assert first["attempts"] == 2
+
+    db_session.add(Score(user_id=user.id, score=0, details=details([False, False])))
+    await db_session.commit()
+
+    # The stale result is served while the recompute runs
+    second = (await logged_in_client.get("/api/analytics/calibration")).json()
+    assert second["attempts"] == 2
+    await calibration_cache.wait()
+    third = (await logged_in_client.get("/api/analytics/calibration")).json()
+    assert third["attempts"] == 3
+
+
+@pytest.mark.asyncio
+async def test_calibration_is_not_recomputed_within_min_interval(
+    logged_in_client, db_session, user, monkeypatch
+):
+    monkeypatch.setattr(calibration_cache, "min_interval", 3600)
+    first = (await logged_in_client.get("/api/analytics/calibration")).json()
+
+    db_session.add(Score(user_id=user.id, score=0, details=details([False, False])))
+    await db_session.commit()
+
+    second = (await logged_in_client.get("/api/analytics/calibration")).json()
+    await calibration_cache.wait()
+    assert second == first
+    assert calibration_cache.latest(question_index)["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_calibration_endpoint_requires_login(client):
+    response = await client.get("/api/analytics/calibration")
+    assert response.status_code == 403
@@ -0,0 +1,61 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from calibration_website.assets import (
+    AssetFiles,
+    AssetManifest,
+    accepted_encodings,
+    build_assets,
+)
+
+
+@pytest.fixture
+def built_static(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_text("body { color: red; }\n" * 50)
+    (tmp_path / "favicon.png").write_bytes(b"\x89PNG")
+    manifest = build_assets(str(tmp_path))
+    return tmp_path, manifest
+
+
+def test_build_fingerprints_and_compresses(built_static):
+    static_dir, manifest = built_static
+    hashed = manifest["css/style.css"]
+    assert hashed.startswith("css/style.") and hashed.endswith(".css")
+    compressed = (static_dir / "dist" / (hashed + ".gz")).read_bytes()
+    assert gzip.decompress(compressed) == (static_dir / "css" / "style.css").read_bytes()
+    # Images are copied, but not compressed
+    assert not (static_dir / "dist" / (manifest["favicon.png"] + ".gz")).exists()
+
+    assets = AssetManifest(str(static_dir))
+    assert assets.url("css/style.css") == f"/static/dist/{hashed}"
+    assert assets.url("js/missing.js") == "/static/js/missing.js"
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0.5") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("gzip;q=0, br") == {"br"}
+    assert accepted_encodings("") == set()
+
+
+@pytest.mark.asyncio
+async def test_serves_precompressed_immutable_assets(built_static):
+    static_dir, manifest = built_static
+    app = FastAPI()
+    app.mount("/static", AssetFiles(directory=str(static_dir)), name="static")
+    url = f"/static/dist/{manifest['css/style.css']}"
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/css")
+        assert "immutable" in response.headers["cache-control"]
+        assert response.text == (static_dir / "css" / "style.css").read_text()
+
+        response = await client.get(url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+        response = await client.get("/static/css/style.css")
+        assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+import time
+from fastapi import HTTPException
+from calibration_website.auth import (
+    HashingPool,
+    identity_cache,
+    get_password_hash_async,
+    verify_password_async,
+)
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify():
+    hashed = await get_password_hash_async("password123")
+    assert await verify_password_async("password123", hashed)
+    assert not await verify_password_async("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_rejects_when_saturated():
+    pool = HashingPool(kind="thread", max_workers=1, max_queue=0)
+    try:
+        slow = asyncio.create_task(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(len, "x")
+        assert exc_info.value.status_code == 503
+
+        await slow
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 1
+        assert stats["queue_depth"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_profile_deletion_invalidates_identity_cache(logged_in_client, user):
+    assert identity_cache.get(user.id) == "scoreuser"
+    response = await logged_in_client.delete("/profile")
+    assert response.status_code == 200, response.text
+    assert identity_cache.get(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_stats_require_login(client, user):
+    response = await client.get("/api/hashing-pool")
+    assert response.status_code == 403
+    response = await client.post(
+        "/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert response.status_code == 303
+    response = await client.get("/api/hashing-pool")
+    assert response.status_code == 200
+    assert "queue_depth" in response.json()
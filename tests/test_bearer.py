@@ -0,0 +1,93 @@
+import datetime
+import time
+import pytest
+from jose import jwt
+from calibration_website import auth
+from calibration_website.auth import create_access_token
+from calibration_website.main import question_bank
+
+
+@pytest.fixture
+async def token(client, user):
+    response = await client.post(
+        "/api/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["token_type"] == "bearer"
+    return response.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_bearer_token_authenticates_api_calls(client, token, count_statements):
+    headers = {"Authorization": f"Bearer {token}"}
+    question_index = question_bank.index
+    answer = question_index.answers[0]
+    response = await client.post(
+        "/submit",
+        json={
+            "question_ids": [question_index.ids[0]],
+            "answers": {"lower_0": answer, "upper_0": answer},
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+    with count_statements() as statements:
+        response = await client.get("/api/score-history", headers=headers)
+    assert response.status_code == 200
+    assert [item["score"] for item in response.json()["items"]] == [100.0]
+    # Token and user are cached, only the page query runs
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_verified_tokens_are_cached(client, token, monkeypatch):
+    calls = []
+    decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(3):
+        response = await client.get("/questions", headers=headers)
+        assert response.status_code == 200
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_or_expired_tokens_are_rejected(client, user):
+    expired = create_access_token(
+        {"sub": "scoreuser", "uid": user.id}, datetime.timedelta(seconds=-1)
+    )
+    for token in ("not-a-token", expired):
+        response = await client.get(
+            "/api/score-history", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_refused_without_secret_key(client, user, monkeypatch):
+    forged = jwt.encode(
+        {"sub": "scoreuser", "uid": user.id, "exp": time.time() + 60},
+        "YOUR_SECRET_KEY",
+        algorithm=auth.ALGORITHM,
+    )
+    monkeypatch.setattr(auth, "SECRET_KEY", "")
+    response = await client.get(
+        "/api/score-history", headers={"Authorization": f"Bearer {forged}"}
+    )
+    assert response.status_code == 401
+    response = await client.post(
+        "/api/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert response.status_code == 503
+    # Session logins keep working
+    response = await client.post(
+        "/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert response.status_code == 303
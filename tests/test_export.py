@@ -0,0 +1,52 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from calibration_website.models import Score, User
+
+DETAILS = [
+    {"question_id": 1, "question": "q1", "correct": True, "correct_answer": 3.0},
+    {"question_id": 2, "question": "q2", "correct": False, "correct_answer": 4.0},
+]
+
+
+@pytest.fixture(autouse=True)
+async def scores(db_session, user):
+    other = User(username="other", email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    await db_session.flush()
+    for i in range(3):
+        db_session.add(Score(user_id=user.id, score=50.0, details=DETAILS))
+    db_session.add(Score(user_id=other.id, score=0.0, details=DETAILS))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_contains_only_own_scores(logged_in_client, user):
+    response = await logged_in_client.get("/api/export")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert all(line["user_id"] == user.id for line in lines)
+    assert lines[0]["details"] == DETAILS
+
+
+@pytest.mark.asyncio
+async def test_gzipped_csv_export_has_one_row_per_question(logged_in_client):
+    response = await logged_in_client.get(
+        "/api/export", params={"format": "csv", "gzip": True}
+    )
+    assert response.status_code == 200, response.text
+    assert 'filename="scores.csv.gz"' in response.headers["content-disposition"]
+    text = gzip.decompress(response.content).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 6
+    assert rows[0]["question"] == "q1"
+
+
+@pytest.mark.asyncio
+async def test_export_requires_login(client):
+    response = await client.get("/api/export")
+    assert response.status_code == 403
@@ -0,0 +1,44 @@
+import json
+import logging
+from calibration_website.logconfig import JSONFormatter, SamplingFilter, setup_logging
+
+
+def make_record(**extra):
+    record = logging.makeLogRecord(
+        {"name": "test", "levelname": "INFO", "msg": "Scored %s", "args": (3,)}
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JSONFormatter().format(make_record(event="submit", user_id=7))
+    entry = json.loads(line)
+    assert entry["message"] == "Scored 3"
+    assert entry["level"] == "INFO"
+    assert entry["event"] == "submit"
+    assert entry["user_id"] == 7
+
+
+def test_sampling_filter():
+    sampling = SamplingFilter()
+    assert sampling.filter(make_record())
+    assert sampling.filter(make_record(sample_rate=1.0))
+    assert not sampling.filter(make_record(sample_rate=0.0))
+
+
+def test_setup_logging_writes_json_from_listener_thread(capsys):
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    listener = setup_logging(level="INFO", fmt="json")
+    try:
+        logging.info("Hello %s", "world", extra={"event": "greeting"})
+        logging.info("Dropped", extra={"sample_rate": 0.0})
+    finally:
+        listener.stop()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [line["message"] for line in lines] == ["Hello world"]
+    assert lines[0]["event"] == "greeting"
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import time
+import pytest
+from calibration_website.loopmonitor import LoopMonitor
+
+
+def block_the_loop():
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_monitor_logs_stack_of_blocking_callback(caplog):
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING):
+            block_the_loop()
+            await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["blocks"] == 1
+    assert stats["samples"] > 0
+    assert stats["lag_max_seconds"] >= 0.1
+    assert "block_the_loop" in caplog.text
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stats_endpoint(client, user):
+    response = await client.get("/api/event-loop")
+    assert response.status_code == 403
+    await client.post(
+        "/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    response = await client.get("/api/event-loop")
+    assert response.status_code == 200
+    assert response.json()["running"] is False
@@ -0,0 +1,60 @@
+import pytest
+from calibration_website.metrics import (
+    BCRYPT_SECONDS,
+    REQUESTS,
+    Histogram,
+    instrument_engine,
+    QUERY_SECONDS,
+    statement_type,
+)
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/")
+    samples = {name + labels: value for name, labels, value in histogram.samples()}
+    assert samples['test_seconds_bucket{route="/",le="0.1"}'] == 1
+    assert samples['test_seconds_bucket{route="/",le="1.0"}'] == 3
+    assert samples['test_seconds_bucket{route="/",le="+Inf"}'] == 4
+    assert samples['test_seconds_count{route="/"}'] == 4
+    assert samples['test_seconds_sum{route="/"}'] == pytest.approx(4.25)
+
+
+def test_statement_type():
+    assert statement_type("  select 1") == "SELECT"
+    assert statement_type("INSERT INTO scores VALUES (?)") == "INSERT"
+    assert statement_type("BEGIN") == "OTHER"
+
+
+@pytest.mark.asyncio
+async def test_engine_queries_are_timed():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    before = QUERY_SECONDS.count("SELECT")
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await engine.dispose()
+    assert QUERY_SECONDS.count("SELECT") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_and_bcrypt(client, user):
+    before = REQUESTS.value("GET", "/check-auth", "200")
+    await client.get("/check-auth")
+    assert REQUESTS.value("GET", "/check-auth", "200") == before + 1
+
+    response = await client.post(
+        "/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert BCRYPT_SECONDS.count("verify_password") >= 1
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_requests_total{method="GET",route="/check-auth",status="200"}' in (
+        response.text
+    )
+    assert 'bcrypt_duration_seconds_count{operation="verify_password"}' in response.text
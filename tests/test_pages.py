@@ -0,0 +1,40 @@
+import pytest
+from calibration_website.main import pages
+
+
+@pytest.mark.asyncio
+async def test_index_is_revalidated_with_etag(client):
+    response = await client.get("/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"')
+
+    response = await client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = await client.get("/", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_head_index_has_no_body(client):
+    full = await client.get("/")
+    response = await client.head("/")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["etag"] == full.headers["etag"]
+    assert response.headers["content-length"] == str(len(full.content))
+
+
+@pytest.mark.asyncio
+async def test_login_page_is_cached_per_redirect(client):
+    pages.clear()
+    plain = await client.get("/login")
+    redirected = await client.get("/login", params={"redirect": "/profile"})
+    assert 'value="/profile"' in redirected.text
+    assert plain.headers["etag"] != redirected.headers["etag"]
+
+    escaped = await client.get("/login", params={"redirect": '"><script>'})
+    assert "<script>" not in escaped.text.split('id="redirect-url"')[1][:80]
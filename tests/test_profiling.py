@@ -0,0 +1,61 @@
+import time
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from calibration_website.profiling import (
+    ProfilingMiddleware,
+    sign_profile_token,
+    verify_profile_token,
+)
+
+
+def make_app(**options):
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(range(1000))}
+
+    app.add_middleware(ProfilingMiddleware, **options)
+    return app
+
+
+def test_profile_tokens_expire_and_need_the_secret():
+    token = sign_profile_token("secret", int(time.time()) + 60)
+    assert verify_profile_token("secret", token)
+    assert not verify_profile_token("other", token)
+    assert not verify_profile_token("", token)
+    assert not verify_profile_token("secret", sign_profile_token("secret", 1))
+    assert not verify_profile_token("secret", "garbage")
+
+
+@pytest.mark.asyncio
+async def test_signed_header_returns_profile_report():
+    app = make_app(secret="secret", admins=(), output_dir="")
+    token = sign_profile_token("secret", int(time.time()) + 60)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/work")
+        assert response.json() == {"total": 499500}
+
+        response = await client.get(
+            "/work",
+            params={"_profile_memory": "1"},
+            headers={"X-Profile-Token": token},
+        )
+        assert response.headers["content-type"].startswith("text/html")
+        assert "GET /work" in response.text
+        assert "Top allocations" in response.text
+
+        response = await client.get("/work", headers={"X-Profile-Token": "1:bad"})
+        assert response.json() == {"total": 499500}
+
+
+@pytest.mark.asyncio
+async def test_reports_written_to_output_dir(tmp_path):
+    app = make_app(secret="secret", admins=(), output_dir=str(tmp_path))
+    token = sign_profile_token("secret", int(time.time()) + 60)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/work", headers={"X-Profile-Token": token})
+    assert response.json() == {"total": 499500}
+    (report,) = tmp_path.iterdir()
+    assert report.name.endswith("-GET-work.html")
@@ -0,0 +1,71 @@
+import pytest
+from calibration_website.auth import identity_cache
+from calibration_website.models import Score
+
+
+@pytest.fixture(autouse=True)
+async def scores(db_session, user):
+    for i in range(20):
+        db_session.add(Score(user_id=user.id, score=50.0, details=[{"i": i}]))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_login_does_not_load_scores(client, count_statements):
+    with count_statements() as statements:
+        response = await client.post(
+            "/token", data={"username": "scoreuser", "password": "password123"}
+        )
+    assert response.status_code == 303, response.text
+    assert len(statements) == 1
+    assert "scores" not in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_submit_statement_count(logged_in_client, count_statements):
+    payload = {
+        "question_ids": [1, 2],
+        "answers": {"lower_0": 0, "upper_0": 1e15, "lower_1": 0, "upper_1": 1},
+    }
+    with count_statements() as statements:
+        response = await logged_in_client.post("/submit", json=payload)
+    assert response.status_code == 200, response.text
+    # the insert, the stats upsert and the seen-questions lookup and upsert;
+    # the user id comes from the session
+    assert len(statements) == 4
+
+
+@pytest.mark.asyncio
+async def test_profile_statement_count(logged_in_client, count_statements):
+    with count_statements() as statements:
+        response = await logged_in_client.get("/profile")
+    assert response.status_code == 200, response.text
+    assert len(statements) == 2
+    assert "details" not in statements[1]
+
+
+@pytest.mark.asyncio
+async def test_score_history_statement_count(logged_in_client, count_statements):
+    with count_statements() as statements:
+        response = await logged_in_client.get("/api/score-history")
+    assert response.status_code == 200, response.text
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_identity_cache_miss_costs_one_query(logged_in_client, count_statements):
+    identity_cache.clear()
+    with count_statements() as statements:
+        await logged_in_client.get("/api/score-history")
+        await logged_in_client.get("/api/score-history")
+    # one lookup on the first request, then the cache answers
+    assert len(statements) == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_profile_statement_count(logged_in_client, count_statements):
+    with count_statements() as statements:
+        response = await logged_in_client.delete("/profile")
+    assert response.status_code == 200, response.text
+    # deletes of scores, stats, seen questions and the user
+    assert len(statements) == 4
@@ -0,0 +1,72 @@
+import json
+import os
+import pytest
+from calibration_website.main import question_bank
+from calibration_website.questions import QuestionBank
+
+question_index = question_bank.index
+
+
+@pytest.mark.asyncio
+async def test_questions_do_not_reveal_answers(client):
+    response = await client.get("/questions")
+    assert response.status_code == 200, response.text
+    questions = response.json()
+    assert len(questions) == 10
+    assert all(set(question) == {"id", "question"} for question in questions)
+
+
+@pytest.mark.asyncio
+async def test_submit_scores_against_server_answers(client):
+    question_ids = question_index.ids[:2]
+    answer = question_index.answers[0]
+    response = await client.post(
+        "/submit",
+        json={
+            "question_ids": question_ids,
+            "answers": {
+                "lower_0": answer,
+                "upper_0": answer,
+                "lower_1": -2,
+                "upper_1": -1,
+            },
+        },
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["score"] == 50
+    assert [item["correct"] for item in result["detailed_results"]] == [True, False]
+    assert result["detailed_results"][0]["correct_answer"] == answer
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_unknown_question_ids(client):
+    response = await client.post(
+        "/submit",
+        json={"question_ids": [-1], "answers": {"lower_0": 0, "upper_0": 1}},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_question_bank_reloads_changed_file(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps([{"id": 1, "question": "a", "answer": 1}]))
+    bank = QuestionBank(str(path), check_interval=0)
+    old_index = await bank.current()
+
+    questions = [
+        {"id": 1, "question": "a", "answer": 1},
+        {"id": 2, "question": "b", "answer": 2},
+    ]
+    path.write_text(json.dumps(questions))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    new_index = await bank.current()
+    assert len(new_index) == 2
+    assert json.loads(new_index.render_json([1])) == [{"id": 2, "question": "b"}]
+    # Requests holding the old snapshot keep a consistent view
+    assert len(old_index) == 1
+
+    path.write_text("not json")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert await bank.current() is new_index
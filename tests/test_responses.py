@@ -0,0 +1,44 @@
+import datetime
+import json
+import numpy as np
+import pytest
+from calibration_website import responses
+from calibration_website.responses import dumps, render_score_page
+from calibration_website.schemas import ScorePage
+
+CONTENT = {
+    "score": np.float64(50.0),
+    "hits": np.array([True, False]),
+    "date": datetime.datetime(2024, 1, 2, 3, 4, 5, 678000),
+    "text": "Zürich",
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_with_and_without_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("orjson is not installed")
+    assert json.loads(dumps(CONTENT)) == {
+        "score": 50.0,
+        "hits": [True, False],
+        "date": "2024-01-02T03:04:05.678000",
+        "text": "Zürich",
+    }
+
+
+def test_score_page_matches_pydantic_serialization():
+    date = datetime.datetime(2024, 1, 1, 12, 30)
+    rows = [(2, 80, date, '[{"question_id": 1}]'), (1, 50.5, date, None)]
+    expected = ScorePage(
+        items=[
+            {"id": 2, "score": 80, "date": date, "details": [{"question_id": 1}]},
+            {"id": 1, "score": 50.5, "date": date, "details": None},
+        ],
+        next_cursor="cursor",
+    )
+    assert json.loads(render_score_page(rows, "cursor")) == json.loads(
+        expected.model_dump_json()
+    )
+    assert json.loads(render_score_page([])) == {"items": [], "next_cursor": None}
@@ -0,0 +1,58 @@
+import pytest
+import datetime
+from calibration_website.models import Score
+
+
+@pytest.fixture(autouse=True)
+async def scores(db_session, user):
+    # Several attempts share a timestamp so the id has to break ties
+    start = datetime.datetime(2024, 1, 1)
+    for i in range(25):
+        db_session.add(
+            Score(
+                user_id=user.id,
+                score=float(i),
+                date=start + datetime.timedelta(hours=i // 2),
+                details=[{"attempt": i}],
+            )
+        )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_score_history_pages_through_all_scores(logged_in_client):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        response = await logged_in_client.get("/api/score-history", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 10
+        seen.extend(item["score"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [float(i) for i in reversed(range(25))]
+
+
+@pytest.mark.asyncio
+async def test_score_history_details_are_opt_in(logged_in_client):
+    response = await logged_in_client.get("/api/score-history", params={"limit": 1})
+    assert response.json()["items"][0]["details"] is None
+
+    response = await logged_in_client.get(
+        "/api/score-history", params={"limit": 1, "include_details": True}
+    )
+    assert response.json()["items"][0]["details"] == [{"attempt": 24}]
+
+
+@pytest.mark.asyncio
+async def test_score_history_rejects_invalid_cursor(logged_in_client):
+    response = await logged_in_client.get(
+        "/api/score-history", params={"cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
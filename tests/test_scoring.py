@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from calibration_website.scoring import score_attempt, score_intervals
+
+
+def test_single_attempt_metrics():
+    truth = np.array([100.0, 10.0, -5.0, 1000.0])
+    lower = np.array([50.0, 20.0, -10.0, 1000.0])
+    upper = np.array([200.0, 30.0, 0.0, 1000.0])
+
+    metrics = score_intervals(lower, upper, truth, alpha=0.1)
+
+    assert metrics["hits"].tolist() == [True, False, True, True]
+    assert metrics["coverage"] == pytest.approx(0.75)
+    assert metrics["overconfidence"] == pytest.approx(0.9 - 0.75)
+    # Widths relative to the answer: 1.5, 1.0, 2.0 and a zero-width hit
+    expected_width = np.log10([1.5, 1.0, 2.0, 1e-12]).mean()
+    assert metrics["mean_log_width"] == pytest.approx(expected_width)
+    # The miss adds 2 / alpha times its distance from the interval
+    expected_score = np.mean([1.5, (10.0 + 20.0 * 10.0) / 10.0, 2.0, 0.0])
+    assert metrics["interval_score"] == pytest.approx(expected_score)
+
+
+def test_batch_matches_single_attempts():
+    rng = np.random.default_rng(0)
+    truth = rng.uniform(1, 1e6, size=(50, 10))
+    lower = truth * rng.uniform(0.5, 1.2, size=truth.shape)
+    upper = lower * rng.uniform(1.0, 2.0, size=truth.shape)
+
+    batch = score_intervals(lower, upper, truth)
+
+    assert batch["coverage"].shape == (50,)
+    for i in range(50):
+        single = score_intervals(lower[i], upper[i], truth[i])
+        for name in ("coverage", "mean_log_width", "interval_score", "overconfidence"):
+            assert batch[name][i] == pytest.approx(single[name])
+
+
+def test_single_attempt_fast_path_matches_engine():
+    rng = np.random.default_rng(1)
+    truth = rng.uniform(-1e6, 1e6, size=10)
+    lower = truth * rng.uniform(0.5, 1.2, size=10)
+    upper = lower + np.abs(truth) * rng.uniform(-0.1, 1.0, size=10)
+
+    engine = score_intervals(lower, upper, truth)
+    fast = score_attempt(lower.tolist(), upper.tolist(), truth.tolist())
+
+    assert fast["hits"] == engine["hits"].tolist()
+    for name in ("coverage", "mean_log_width", "interval_score", "overconfidence"):
+        assert fast[name] == pytest.approx(engine[name])
@@ -0,0 +1,90 @@
+import pytest
+from calibration_website.questions import QuestionIndex
+from calibration_website.selection import (
+    QuestionSelector,
+    SeenQuestions,
+    bits_from_ids,
+)
+
+
+def make_index():
+    # Two categories times three magnitude groups, ten questions each
+    questions = []
+    for group, answer in enumerate([5, 5000, 5000000]):
+        for category in ("history", "science"):
+            for _ in range(10):
+                questions.append(
+                    {
+                        "id": len(questions) + 1,
+                        "question": f"q{len(questions) + 1}",
+                        "answer": answer,
+                        "category": category,
+                    }
+                )
+    return QuestionIndex(questions)
+
+
+def test_selection_is_balanced_across_strata():
+    index = make_index()
+    selector = QuestionSelector(index)
+    assert len(selector.strata) == 6
+
+    for _ in range(20):
+        positions = selector.select(6)
+        assert len(set(positions)) == 6
+        strata = {(index.categories[i], int(index.answers[i])) for i in positions}
+        assert len(strata) == 6
+
+
+def test_selection_skips_seen_questions_until_exhausted():
+    index = make_index()
+    selector = QuestionSelector(index)
+    seen = bits_from_ids(range(1, 56))
+
+    positions = selector.select(5, seen)
+    assert sorted(index.ids[i] for i in positions) == [56, 57, 58, 59, 60]
+
+    # Only five unseen questions are left, seen ones fill up the quiz
+    positions = selector.select(8, seen)
+    assert len(set(positions)) == 8
+    assert {56, 57, 58, 59, 60} <= {index.ids[i] for i in positions}
+
+
+@pytest.mark.asyncio
+async def test_questions_exclude_what_the_user_was_asked(logged_in_client):
+    first = (await logged_in_client.get("/questions")).json()
+    response = await logged_in_client.post(
+        "/submit",
+        json={
+            "question_ids": [question["id"] for question in first],
+            "answers": {
+                f"{bound}_{i}": 0
+                for i in range(len(first))
+                for bound in ("lower", "upper")
+            },
+        },
+    )
+    assert response.status_code == 200, response.text
+
+    second = (
+        await logged_in_client.get("/questions", params={"exclude_seen": True})
+    ).json()
+    assert not {question["id"] for question in first} & {
+        question["id"] for question in second
+    }
+
+
+@pytest.mark.asyncio
+async def test_seen_bits_are_cached_only_after_commit(db_session, user):
+    seen = SeenQuestions()
+    user_id = user.id  # rollback expires the user
+    await seen.add(db_session, user_id, [3, 4])
+    await db_session.rollback()
+    assert await seen.get(db_session, user_id) == 0
+
+    await seen.add(db_session, user_id, [3])
+    await seen.add(db_session, user_id, [5])
+    await db_session.commit()
+    assert seen._cache.get(user_id) == bits_from_ids([3, 5])
+    seen.clear()
+    assert await seen.get(db_session, user_id) == bits_from_ids([3, 5])
@@ -0,0 +1,69 @@
+import datetime
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from calibration_website.main import session_backend
+from calibration_website.models import WebSession
+from calibration_website.sessionstore import SESSION_COOKIE, SQLiteSessionBackend
+
+
+@pytest.mark.asyncio
+async def test_cookie_only_holds_an_opaque_id(logged_in_client):
+    session_id = logged_in_client.cookies[SESSION_COOKIE]
+    assert len(session_id) >= 40
+    assert "scoreuser" not in session_id
+    session = await session_backend.load(session_id)
+    assert session["username"] == "scoreuser"
+
+    response = await logged_in_client.get("/check-auth")
+    assert response.json()["is_authenticated"] is True
+    # Unchanged sessions are not written back
+    assert "set-cookie" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_logout_deletes_the_session(logged_in_client):
+    session_id = logged_in_client.cookies[SESSION_COOKIE]
+    await logged_in_client.get("/logout")
+    assert await session_backend.load(session_id) is None
+    response = await logged_in_client.get("/check-auth")
+    assert response.json()["is_authenticated"] is False
+
+
+@pytest.mark.asyncio
+async def test_login_never_reuses_a_planted_session_id(client, user):
+    client.cookies.set(SESSION_COOKIE, "planted")
+    response = await client.post(
+        "/token", data={"username": "scoreuser", "password": "password123"}
+    )
+    assert response.status_code == 303
+    assert response.cookies[SESSION_COOKIE] != "planted"
+
+
+@pytest.mark.asyncio
+async def test_static_files_skip_the_session(logged_in_client):
+    response = await logged_in_client.get("/static/css/style.css")
+    assert response.status_code == 200
+    assert "set-cookie" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_expires_and_sweeps(db_session):
+    backend = SQLiteSessionBackend(
+        sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+    )
+    await backend.save("live", {"user_id": 1}, max_age=60)
+    await backend.save("stale", {"user_id": 2}, max_age=60)
+    await backend.save("live", {"user_id": 3}, max_age=60)
+    assert await backend.load("live") == {"user_id": 3}
+
+    stale = await db_session.get(WebSession, "stale")
+    stale.expires_at = datetime.datetime(2000, 1, 1)
+    await db_session.commit()
+    assert await backend.load("stale") is None
+    assert await backend.sweep() == 1
+    assert (await db_session.scalars(select(WebSession.id))).all() == ["live"]
+
+    await backend.delete("live")
+    assert await backend.load("live") is None
@@ -0,0 +1,48 @@
+import pytest
+from calibration_website.main import question_bank
+
+question_index = question_bank.index
+
+
+def submission(hits, total=4):
+    """Build a submission where the first ``hits`` bounds contain the answer."""
+    answers = {}
+    for i, answer in enumerate(question_index.answers[:total]):
+        if i < hits:
+            answers[f"lower_{i}"] = answer
+            answers[f"upper_{i}"] = answer
+        else:
+            answers[f"lower_{i}"] = answer + 1
+            answers[f"upper_{i}"] = answer + 2
+    return {"question_ids": question_index.ids[:total], "answers": answers}
+
+
+@pytest.mark.asyncio
+async def test_stats_start_empty(logged_in_client):
+    response = await logged_in_client.get("/api/stats")
+    assert response.status_code == 200, response.text
+    stats = response.json()
+    assert stats["attempt_count"] == 0
+    assert stats["mean_score"] is None
+
+
+@pytest.mark.asyncio
+async def test_submit_updates_stats(logged_in_client):
+    for hits in (1, 4, 2):
+        response = await logged_in_client.post("/submit", json=submission(hits))
+        assert response.status_code == 200, response.text
+
+    stats = (await logged_in_client.get("/api/stats")).json()
+    assert stats["attempt_count"] == 3
+    assert stats["total_hits"] == 7
+    assert stats["total_questions"] == 12
+    assert stats["hit_rate"] == pytest.approx(7 / 12)
+    assert stats["mean_score"] == pytest.approx((25 + 100 + 50) / 3)
+    assert stats["best_score"] == 100
+    assert stats["last_score"] == 50
+
+
+@pytest.mark.asyncio
+async def test_stats_require_login(client):
+    response = await client.get("/api/stats")
+    assert response.status_code == 403
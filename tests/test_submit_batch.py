@@ -0,0 +1,159 @@
+import datetime
+import functools
+import io
+import json
+import pytest
+from sqlalchemy import func, select
+from calibration_website import main
+from calibration_website.main import question_bank
+from calibration_website.models import Score
+from calibration_website.stats import get_user_stats
+from calibration_website.submissions import (
+    SUBMIT_BATCH_CHUNK,
+    BatchTooLarge,
+    attempt_error,
+    calculate_score,
+    iter_list,
+    submit_batch,
+)
+
+question_index = question_bank.index
+
+
+def make_attempt(i: int) -> dict:
+    question_ids = question_index.ids[i % 5 : i % 5 + 3]
+    answers = {}
+    for j, answer in enumerate(question_index.positions(question_ids)):
+        truth = float(question_index.answers[answer])
+        # Every other interval misses its answer
+        answers[f"lower_{j}"] = truth * 0.5 if (i + j) % 2 else truth * 2
+        answers[f"upper_{j}"] = truth * 1.5 if (i + j) % 2 else truth * 3
+    return {"question_ids": question_ids, "answers": answers}
+
+
+@pytest.mark.asyncio
+async def test_batch_scores_like_submit(logged_in_client, db_session, user):
+    attempts = [make_attempt(i) for i in range(3)]
+    attempts.insert(1, {"question_ids": [-1], "answers": {}})
+    attempts.append({**make_attempt(3), "date": "2024-05-01T12:00:00"})
+
+    response = await logged_in_client.post("/api/submit-batch", json=attempts)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["accepted"] == 4 and body["rejected"] == 1
+    results = {result["index"]: result for result in body["results"]}
+    assert results[1] == {"index": 1, "error": "Unknown question id -1"}
+    for i, attempt in enumerate(attempts):
+        if i == 1:
+            continue
+        score, _, metrics = calculate_score(
+            attempt["question_ids"], attempt["answers"], question_index
+        )
+        assert results[i]["score"] == score
+        assert results[i]["interval_score"] == pytest.approx(metrics["interval_score"])
+
+    stats = await get_user_stats(db_session, user.id)
+    assert stats["attempt_count"] == 4
+    dates = (await db_session.scalars(select(Score.date))).all()
+    assert min(dates).year == 2024
+
+
+@pytest.mark.asyncio
+async def test_ndjson_batch_spans_several_chunks(logged_in_client, db_session):
+    count = SUBMIT_BATCH_CHUNK * 2 + 7
+    lines = [json.dumps(make_attempt(i)) for i in range(count)]
+    lines.insert(5, "{not json")
+    response = await logged_in_client.post(
+        "/api/submit-batch",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["accepted"] == count and body["rejected"] == 1
+    assert len(body["results"]) == count + 1
+    assert await db_session.scalar(select(func.count(Score.id))) == count
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_login(client):
+    response = await client.post("/api/submit-batch", json=[make_attempt(0)])
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_no_transaction_is_open_while_reading(db_session, user):
+    open_while_reading = []
+
+    async def attempts():
+        for i in range(5):
+            open_while_reading.append(db_session.in_transaction())
+            yield make_attempt(i)
+
+    out = io.BytesIO()
+    accepted, rejected = await submit_batch(
+        db_session, user.id, attempts(), question_index, out, chunk_size=2
+    )
+    assert (accepted, rejected) == (5, 0)
+    assert not any(open_while_reading)
+    assert await db_session.scalar(select(func.count(Score.id))) == 5
+
+
+@pytest.mark.asyncio
+async def test_too_many_attempts_stores_nothing(db_session, user):
+    with pytest.raises(BatchTooLarge):
+        await submit_batch(
+            db_session,
+            user.id,
+            iter_list([make_attempt(i) for i in range(4)]),
+            question_index,
+            io.BytesIO(),
+            chunk_size=2,
+            max_attempts=3,
+        )
+    assert await db_session.scalar(select(func.count(Score.id))) == 0
+
+
+@pytest.mark.asyncio
+async def test_too_many_attempts_is_rejected_with_413(
+    logged_in_client, db_session, monkeypatch
+):
+    monkeypatch.setattr(
+        main, "submit_batch", functools.partial(submit_batch, max_attempts=3)
+    )
+    attempts = [make_attempt(i) for i in range(4)]
+    response = await logged_in_client.post("/api/submit-batch", json=attempts)
+    assert response.status_code == 413
+    assert await db_session.scalar(select(func.count(Score.id))) == 0
+
+
+def test_duplicate_and_bool_question_ids_are_rejected():
+    first, second = question_index.ids[:2]
+    answers = {f"{side}_{i}": 1.0 for i in range(3) for side in ("lower", "upper")}
+    duplicates = {"question_ids": [first, second, first], "answers": answers}
+    assert attempt_error(duplicates, question_index) == "Duplicate question ids"
+    flag = {"question_ids": [True], "answers": answers}
+    assert attempt_error(flag, question_index) == "Unknown question id True"
+    valid = {"question_ids": [first, second], "answers": answers}
+    assert attempt_error(valid, question_index) is None
+
+
+@pytest.mark.asyncio
+async def test_dates_with_an_offset_are_stored_as_utc(logged_in_client, db_session):
+    attempt = {**make_attempt(0), "date": "2024-01-01T12:00:00+02:00"}
+    response = await logged_in_client.post("/api/submit-batch", json=[attempt])
+    assert response.status_code == 200, response.text
+    stored = await db_session.scalar(select(Score.date))
+    assert stored.replace(tzinfo=None) == datetime.datetime(2024, 1, 1, 10, 0)
+    stats = (await logged_in_client.get("/api/stats")).json()
+    assert stats["last_attempt_date"].startswith("2024-01-01T10:00:00")
+
+
+@pytest.mark.parametrize("bound", ["nan", "inf", "-Infinity", float("nan")])
+def test_non_finite_bounds_are_rejected(bound):
+    attempt = {
+        "question_ids": [question_index.ids[0]],
+        "answers": {"lower_0": 0, "upper_0": bound},
+    }
+    error = attempt_error(attempt, question_index)
+    assert error == "Non-finite bounds provided for question 0"
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+import sqlite3
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from calibration_website.models import Score, UserStats
+from calibration_website.writebehind import ScoreWriter
+
+DETAILS = [{"correct": True}, {"correct": False}]
+
+
+@pytest.fixture
+def session_factory(db_session):
+    return sessionmaker(db_session.bind, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_scores_are_written_in_batches(db_session, user, session_factory):
+    writer = ScoreWriter(session_factory, batch_size=5, flush_interval=1.0)
+    await writer.start()
+    date = datetime.datetime(2024, 1, 1)
+    await asyncio.gather(
+        *(writer.submit(user.id, 50.0, DETAILS, date) for _ in range(10))
+    )
+    await writer.stop()
+
+    assert writer.stats() == {"queued": 0, "batches": 2, "rows": 10}
+    count = await db_session.scalar(select(func.count()).select_from(Score))
+    assert count == 10
+    stats = await db_session.get(UserStats, user.id)
+    assert stats.attempt_count == 10
+    assert stats.total_hits == 10
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queued_scores(db_session, user, session_factory):
+    writer = ScoreWriter(
+        session_factory, batch_size=100, flush_interval=10.0, wait_for_commit=False
+    )
+    await writer.start()
+    for _ in range(3):
+        await writer.submit(user.id, 50.0, DETAILS, datetime.datetime(2024, 1, 1))
+    await writer.stop()
+
+    count = await db_session.scalar(select(func.count()).select_from(Score))
+    assert count == 3
+
+
+@pytest.mark.asyncio
+async def test_locked_database_is_retried(db_session, user, session_factory):
+    writer = ScoreWriter(session_factory, flush_interval=0.01, retry_delay=0.001)
+    write = writer._write
+    failures = []
+
+    async def flaky_write(rows):
+        if len(failures) < 2:
+            failures.append(1)
+            raise OperationalError(
+                "INSERT", {}, sqlite3.OperationalError("database is locked")
+            )
+        await write(rows)
+
+    writer._write = flaky_write
+    await writer.start()
+    await writer.submit(user.id, 50.0, DETAILS, datetime.datetime(2024, 1, 1))
+    await writer.stop()
+
+    assert len(failures) == 2
+    count = await db_session.scalar(select(func.count()).select_from(Score))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_bad_row_only_fails_its_own_submission(db_session, user, session_factory):
+    writer = ScoreWriter(session_factory, batch_size=3, flush_interval=1.0)
+    await writer.start()
+    date = datetime.datetime(2024, 1, 1)
+    bad_details = [{"correct": True, "unserializable": object()}]
+    results = await asyncio.gather(
+        writer.submit(user.id, 50.0, DETAILS, date),
+        writer.submit(user.id, 50.0, bad_details, date),
+        writer.submit(user.id, 50.0, DETAILS, date),
+        return_exceptions=True,
+    )
+    await writer.stop()
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], Exception)
+    count = await db_session.scalar(select(func.count()).select_from(Score))
+    assert count == 2
+    stats = await db_session.get(UserStats, user.id)
+    assert stats.attempt_count == 2